@@ -0,0 +1,15 @@
+"""Helpers for ints used as bitsets."""
+
+from typing import Iterator
+
+
+def set_bits(mask: int) -> Iterator[int]:
+    """Yields the index of each set bit in mask, lowest first.
+
+    >>> list(set_bits(0b10110))
+    [1, 2, 4]
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
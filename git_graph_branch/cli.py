@@ -1,21 +1,72 @@
 import asyncio
 import pdb
+import re
+import shutil
 import signal
 import sys
+import time
 from argparse import SUPPRESS, ArgumentParser
+from concurrent.futures import Executor, ThreadPoolExecutor
 from contextlib import suppress
 from datetime import timedelta
 from logging import getLogger
 from types import TracebackType
 from typing import Sequence, Type, TypeVar
 
-from .dag import layout
-from .display import Config, print_branch
-from .git import branches, compute_branch_dag, worktree_branches
-from .nix import once, watcher
+from .dag import DAG, IncrementalLayout, NodeArt
+from .display import (
+    Config,
+    OrderedLines,
+    RowCache,
+    Screen,
+    display_width,
+    fits_terminal,
+    format_elided_note,
+    format_horizon_note,
+    format_skeleton,
+    max_details_width,
+    write_frame,
+)
+from .git import (
+    Branch,
+    HistoryHorizon,
+    IncrementalBranchDag,
+    branches,
+    worktree_branches,
+)
+from .git.bitmap import BranchBitmapIndex
+from .git.config import history_horizon
+from .nix import flush_held_io, once, watcher
 
 LOG = getLogger(__name__)
 T = TypeVar("T")
+DURATION = re.compile(r"^(\d+)([smhdw])$")
+DURATION_UNITS = {
+    "s": 1,
+    "m": 60,
+    "h": 60 * 60,
+    "d": 24 * 60 * 60,
+    "w": 7 * 24 * 60 * 60,
+}
+
+
+WATCH_MAX_UNMERGED = 1000
+HORIZON_GRANULARITY_SECS = 60 * 60
+
+
+def positive_int(value: str) -> int:
+    count = int(value)
+    if count <= 0:
+        raise ValueError(f"Not a positive integer: {value}")
+    return count
+
+
+def duration(value: str) -> timedelta:
+    """Parse a duration like 90d or 12w."""
+    m = DURATION.match(value.strip())
+    if not m:
+        raise ValueError(f"Invalid duration: {value}")
+    return timedelta(seconds=int(m.group(1)) * DURATION_UNITS[m.group(2)])
 
 
 def parse_args(args: Sequence[str] | None, *, is_tty: bool) -> Config:
@@ -41,6 +92,59 @@ def parse_args(args: Sequence[str] | None, *, is_tty: bool) -> Config:
     p.add_argument(
         "--no-remote-icons", action="store_false", dest="remote_icons", help=SUPPRESS
     )
+    p.add_argument(
+        "--history-horizon",
+        type=duration,
+        dest="history_horizon",
+        metavar="AGE",
+        default=defaults.history_horizon,
+        help="Ignore reflog entries and merges older than AGE, e.g. 90d or 12w; "
+        "defaults to the graph-branch.historyHorizon git config",
+    )
+    p.add_argument(
+        "--max-unmerged",
+        type=positive_int,
+        dest="max_unmerged",
+        metavar="N",
+        default=defaults.max_unmerged,
+        help="Stop counting unmerged commits after N, displaying N+; "
+        f"defaults to {WATCH_MAX_UNMERGED} when watching",
+    )
+    p.add_argument(
+        "--max-rows",
+        type=positive_int,
+        dest="max_rows",
+        metavar="N",
+        default=defaults.max_rows,
+        help="Only display the first N rows of the graph; "
+        "defaults to the terminal height when watching",
+    )
+    p.add_argument(
+        "--progressive",
+        action="store_true",
+        dest="progressive",
+        default=defaults.progressive,
+        help="Draw the graph as soon as it is laid out, filling in remote icons "
+        "and unmerged counts as they are computed",
+    )
+    p.add_argument(
+        "-j",
+        "--jobs",
+        type=positive_int,
+        dest="jobs",
+        metavar="N",
+        default=defaults.jobs,
+        help="Read git data and compute branch details on up to N threads; "
+        "defaults to the number of CPUs plus 4, at most 32",
+    )
+    p.add_argument(
+        "--reachability-bitmaps",
+        action="store_true",
+        dest="reachability_bitmaps",
+        default=defaults.reachability_bitmaps,
+        help="Keep per-branch reachability bitmaps between refreshes; "
+        "speeds up --watch on large repositories",
+    )
     p.add_argument("--pdb", action="store_true", dest="pdb", help=SUPPRESS)
     if is_tty:
         watch = p.add_argument_group("watch options")
@@ -60,7 +164,10 @@ def parse_args(args: Sequence[str] | None, *, is_tty: bool) -> Config:
             default=defaults.poll_every,
             help="If watching, how often to poll for changes (default: %(default)s)",
         )
-    return p.parse_args(args=args, namespace=defaults)
+    config = p.parse_args(args=args, namespace=defaults)
+    if config.watch and config.max_unmerged is None:
+        config.max_unmerged = WATCH_MAX_UNMERGED
+    return config
 
 
 def invoke_pdb_excepthook(
@@ -90,26 +197,164 @@ async def handle_signals() -> None:
     loop.add_signal_handler(signal.SIGTERM, cancel_task)
 
 
-def clear_screen() -> None:
-    # Clear the screen and move cursor to top-left corner
-    sys.stdout.write("\x1b[2J\x1b[0;0H")
-    sys.stdout.flush()
+def compute_horizon(config: Config) -> HistoryHorizon | None:
+    age = config.history_horizon
+    if age is None:
+        value = history_horizon()
+        if value is None:
+            return None
+        try:
+            age = duration(value)
+        except ValueError:
+            raise Exception(
+                f'Unexpected value for graph-branch.historyHorizon: "{value}"'
+            ) from None
+    timestamp = int(time.time() - age.total_seconds())
+    # Round down to the hour, so the horizon is stable across watch refreshes
+    # and the previous branch DAG can be reused
+    return HistoryHorizon(timestamp - timestamp % HORIZON_GRANULARITY_SECS)
+
+
+def viewport(
+    config: Config, rows: list[T], horizon: HistoryHorizon | None
+) -> tuple[list[T], list[str]]:
+    """The rows of the graph to display, and the notes to display below them.
+
+    When watching, the rows, the notes and the line the cursor is left on
+    must all fit on the terminal, so the frame can be repainted in place.
+    """
+    notes = []
+    if horizon is not None and horizon.truncated:
+        notes.append(format_horizon_note(horizon, config))
+    max_rows = config.max_rows
+    if max_rows is None and config.watch:
+        available = shutil.get_terminal_size().lines - len(notes) - 1
+        if len(rows) > available:
+            # Leave room for the elided note
+            max_rows = max(1, available - 1)
+    visible = rows[:max_rows]
+    if len(visible) < len(rows):
+        notes.insert(0, format_elided_note(len(rows) - len(visible), config))
+    return visible, notes
+
+
+def progressive_screen(
+    config: Config,
+    screen: Screen,
+    visible: list[tuple[NodeArt, Branch]],
+    wt_branches: set[str],
+    notes: list[str],
+) -> Screen | None:
+    """Where to draw a progressive frame, or None to stream rows in order.
+
+    Outside watch mode, rows are only redrawn in place if the frame is sure to
+    fit on the terminal once every row's details are filled in.
+    """
+    if config.watch:
+        return screen
+    if not config.is_tty:
+        return None
+    details = max_details_width(config)
+    widths = [
+        display_width(format_skeleton(art, b, wt_branches)) + details
+        for art, b in visible
+    ] + [display_width(note) for note in notes]
+    if fits_terminal(widths, shutil.get_terminal_size()):
+        return Screen(inline=True)
+    return None
+
+
+async def draw_progressively(
+    rows: RowCache,
+    visible: list[tuple[NodeArt, Branch]],
+    dag: DAG[Branch],
+    config: Config,
+    wt_branches: set[str],
+    notes: list[str],
+    *,
+    screen: Screen | None,
+    executor: Executor,
+    bitmaps: BranchBitmapIndex | None,
+) -> None:
+    """Draw the graph at once, filling in each row's details as they complete.
+
+    With a screen, rows are first drawn as bare art and branch names, then
+    rewritten in place. Otherwise, completed rows are streamed in order.
+    """
+    if screen is None:
+        on_update = OrderedLines().update
+    else:
+        skeletons = [format_skeleton(art, b, wt_branches) for art, b in visible]
+
+        def on_update(lines: list[str | None]) -> None:
+            assert screen is not None
+            screen.render(
+                [
+                    skeleton if line is None else line
+                    for line, skeleton in zip(lines, skeletons)
+                ]
+                + notes
+            )
+            # Show each update now, rather than once the frame is complete
+            flush_held_io()
+
+    await rows.format_rows_progressively(
+        visible,
+        dag,
+        config,
+        wt_branches,
+        executor=executor,
+        on_update=on_update,
+        bitmaps=bitmaps,
+    )
+    if screen is None:
+        write_frame(notes)
 
 
 async def graph_branches(config: Config) -> None:
-    async with (
-        watcher(timedelta(seconds=config.poll_every)) if config.watch else once()
-    ) as needs_refresh:
-        while await needs_refresh():
-            if config.watch:
-                clear_screen()
-            dag = compute_branch_dag(list(branches()))
-            art_and_branches = layout(dag, key=lambda b: (b.timestamp, b.name))
-            wt_branches = worktree_branches()
-
-            for art, b in art_and_branches:
-                print_branch(art, b, config, dag.parents(b), wt_branches)
-            sys.stdout.flush()
+    bitmaps = BranchBitmapIndex() if config.reachability_bitmaps else None
+    dags = IncrementalBranchDag()
+    layout: IncrementalLayout[Branch, tuple[int, str]] = IncrementalLayout(
+        lambda b: (b.timestamp, b.name)
+    )
+    rows = RowCache()
+    screen = Screen()
+    with ThreadPoolExecutor(
+        max_workers=config.jobs, thread_name_prefix="git-graph-branch"
+    ) as executor:
+        async with (
+            watcher(timedelta(seconds=config.poll_every)) if config.watch else once()
+        ) as needs_refresh:
+            while await needs_refresh():
+                horizon = compute_horizon(config)
+                dag = dags.compute(list(branches()), horizon=horizon, executor=executor)
+                art_and_branches = layout(dag)
+                # The whole DAG is ordered, but only visible rows are annotated
+                visible, notes = viewport(config, art_and_branches, horizon)
+                wt_branches = worktree_branches()
+
+                if config.progressive:
+                    await draw_progressively(
+                        rows,
+                        visible,
+                        dag,
+                        config,
+                        wt_branches,
+                        notes,
+                        screen=progressive_screen(
+                            config, screen, visible, wt_branches, notes
+                        ),
+                        executor=executor,
+                        bitmaps=bitmaps,
+                    )
+                else:
+                    lines = rows.format_rows(
+                        visible, dag, config, wt_branches, bitmaps, executor
+                    )
+                    if config.watch:
+                        screen.render(lines + notes)
+                    else:
+                        write_frame(lines + notes)
 
 
 async def amain(args: Sequence[str] | None = None) -> None:
@@ -8,6 +8,7 @@ from itertools import takewhile
 from typing import (
     Any,
     Callable,
+    ClassVar,
     Collection,
     Iterable,
     Iterator,
@@ -17,6 +18,8 @@ from typing import (
     overload,
 )
 
+from .bits import set_bits
+
 
 class HasLessThan(Protocol):
     def __lt__(self, __other: Any) -> bool: ...
@@ -39,18 +42,39 @@ class DAG[T]:
     """Stores a directed, acyclic graph.
 
     If adding a directed edge would create a cycle, it is ignored.
+
+    If bitsets is true, each node is given an integer id, and the transitive
+    closure used for cycle detection is stored as int bitsets over those ids,
+    so updating it on each insertion is a word-parallel OR per reachable node
+    rather than a set union. This is much faster for large, densely-connected
+    graphs.
     """
 
     @overload
-    def __init__(self, nodes: Iterable[T], edges: Iterable[tuple[T, T]], /) -> None: ...
+    def __init__(
+        self,
+        nodes: Iterable[T],
+        edges: Iterable[tuple[T, T]],
+        /,
+        *,
+        bitsets: bool = False,
+    ) -> None: ...
 
     @overload
     def __init__(
-        self, *, nodes: Iterable[T] = (), edges: Iterable[tuple[T, T]] = ()
+        self,
+        *,
+        nodes: Iterable[T] = (),
+        edges: Iterable[tuple[T, T]] = (),
+        bitsets: bool = False,
     ) -> None: ...
 
     def __init__(
-        self, nodes: Iterable[T] = (), edges: Iterable[tuple[T, T]] = ()
+        self,
+        nodes: Iterable[T] = (),
+        edges: Iterable[tuple[T, T]] = (),
+        *,
+        bitsets: bool = False,
     ) -> None:
         # Use a dict[T, None] instead of a set[T] to preserve insertion order.
         self._edges: dict[T, dict[T, None]] = defaultdict(
@@ -59,11 +83,71 @@ class DAG[T]:
         self._reverse_edges: dict[T, dict[T, None]] = defaultdict(dict)
         self._downstream: dict[T, set[T]] = Reachable()
         self._upstream: dict[T, set[T]] = Reachable()
+        # Union-find forest of connected components, ignoring edge direction
+        self._components: dict[T, T] = {}
+        self._component_sizes: dict[T, int] = {}
+        self._ids: dict[T, int] | None = {} if bitsets else None
+        self._downstream_bits: list[int] = []
+        self._upstream_bits: list[int] = []
         for edge in edges:
             self.add(edge)
 
+    def component(self, node: T) -> T:
+        """A representative node of node's connected component."""
+        root = node
+        while (parent := self._components.get(root, root)) != root:
+            root = parent
+        while node != root:
+            parent = self._components[node]
+            self._components[node] = root
+            node = parent
+        return root
+
+    def _union(self, a: T, b: T) -> None:
+        a = self.component(a)
+        b = self.component(b)
+        if a == b:
+            return
+        a_size = self._component_sizes.get(a, 1)
+        b_size = self._component_sizes.get(b, 1)
+        if a_size < b_size:
+            a, b = b, a
+        self._components[b] = a
+        self._component_sizes[a] = a_size + b_size
+
+    def _id(self, node: T) -> int:
+        assert self._ids is not None
+        try:
+            return self._ids[node]
+        except KeyError:
+            id = self._ids[node] = len(self._ids)
+            self._downstream_bits.append(1 << id)
+            self._upstream_bits.append(1 << id)
+            return id
+
+    def _add_bits(self, from_: T, to_: T) -> bool:
+        from_id = self._id(from_)
+        to_id = self._id(to_)
+        if self._upstream_bits[from_id] >> to_id & 1:
+            return False
+        if to_ in self._edges[from_]:
+            return True
+        self._edges[from_][to_] = None
+        self._edges[to_]
+        self._reverse_edges[to_][from_] = None
+        self._union(from_, to_)
+        upstream = self._upstream_bits[from_id]
+        downstream = self._downstream_bits[to_id]
+        for n in set_bits(downstream):
+            self._upstream_bits[n] |= upstream
+        for n in set_bits(upstream):
+            self._downstream_bits[n] |= downstream
+        return True
+
     def add(self, edge: tuple[T, T], /) -> bool:
         from_, to_ = edge
+        if self._ids is not None:
+            return self._add_bits(from_, to_)
         if to_ in self._upstream[from_]:
             return False
         if to_ in self._edges[from_]:
@@ -71,6 +155,7 @@ class DAG[T]:
         self._edges[from_][to_] = None
         self._edges[to_]
         self._reverse_edges[to_][from_] = None
+        self._union(from_, to_)
         upstream = self._upstream[from_]
         downstream = self._downstream[to_]
         for n in downstream:
@@ -186,27 +271,54 @@ class NodeArt:
         "┼",
     ]
 
-    def __init__(
-        self,
+    at: int
+    up: frozenset[int]
+    down: frozenset[int]
+    through: frozenset[int]
+    _min: int
+    _max: int
+    _cols: int
+    _str: str | None
+
+    MAX_INTERNED = 4096
+    _interned: ClassVar[
+        dict[tuple[int, frozenset[int], frozenset[int], frozenset[int]], NodeArt]
+    ] = {}
+
+    def __new__(
+        cls,
         at: int,
         up: Iterable[int] = (),
         down: Iterable[int] = (),
         through: Iterable[int] = (),
-    ):
-        self.at = at
-        self.up = frozenset(up)
-        self.down = frozenset(down)
-        self.through = frozenset(through)
+    ) -> NodeArt:
+        # Rows are interned by signature, so re-rendering an unchanged graph
+        # (e.g. in watch mode) reuses both the object and its rendered string.
+        # Hits move to the end, so the least recently used row is evicted.
+        signature = (at, frozenset(up), frozenset(down), frozenset(through))
+        interned = cls._interned.pop(signature, None)
+        if interned is not None:
+            cls._interned[signature] = interned
+            return interned
+        self = super().__new__(cls)
+        self.at, self.up, self.down, self.through = signature
         self._min = min({self.at} | self.up | self.down)
         self._max = max({self.at} | self.up | self.down)
         self._cols = max({self._max} | self.through) + 1
+        self._str = None
         assert 0 <= self.at
         assert all(idx >= 0 for idx in self.up)
         assert all(idx >= 0 for idx in self.down)
         assert all(idx >= 0 for idx in self.through)
         assert not any(idx in self.up or idx in self.down for idx in self.through)
+        if len(cls._interned) >= cls.MAX_INTERNED:
+            del cls._interned[next(iter(cls._interned))]
+        cls._interned[signature] = self
+        return self
 
     def __eq__(self, other: Any) -> bool:
+        if self is other:
+            return True
         if not isinstance(other, NodeArt):
             return NotImplemented
         return (
@@ -216,6 +328,9 @@ class NodeArt:
             and self.through == other.through
         )
 
+    def __hash__(self) -> int:
+        return hash((self.at, self.up, self.down, self.through))
+
     def __repr__(self) -> str:
         r = "%s(at = %d" % (type(self).__name__, self.at)
         if self.up:
@@ -265,10 +380,12 @@ class NodeArt:
             return ""
 
     def __str__(self) -> str:
-        return "".join(
-            self._first_codepoint(i) + self._second_codepoint(i)
-            for i in range(self._cols)
-        )
+        if self._str is None:
+            self._str = "".join(
+                self._first_codepoint(i) + self._second_codepoint(i)
+                for i in range(self._cols)
+            )
+        return self._str
 
 
 def reachable_from[T](node: T, *relationships: Callable[[T], Collection[T]]) -> set[T]:
@@ -293,33 +410,33 @@ def add_node_art[T](nodes: list[T], dag: DAG[T]) -> list[tuple[NodeArt, T]]:
     children).
     """
     columns: dict[T, int] = {}
-    active: list[T | None] = []
-    reached: set[T] = set()
+    # Children of each laid-out parent that have not been reached yet
+    remaining: dict[T, int] = {}
+    # Columns with an edge still heading up the list, and one past the highest
+    occupied: set[int] = set()
+    width = 0
     grid: list[tuple[NodeArt, T]] = []
     for b in reversed(nodes):
-        reached.add(b)
+        down: set[int] = set()
+        finished: list[int] = []
+        for p in dag.parents(b):
+            column = columns[p]
+            down.add(column)
+            left = remaining[p] = remaining.get(p, len(dag.children(p))) - 1
+            if not left:
+                finished.append(column)
 
-        finished_parents = [p for p in dag.parents(b) if dag.children(p) <= reached]
-        at = (
-            min(columns[p] for p in finished_parents)
-            if finished_parents
-            else len(active)
-        )
+        at = min(finished) if finished else width
         columns[b] = at
-        down = {columns[p] for p in dag.parents(b)}
-        for p in dag.parents(b):
-            if all(c in columns for c in dag.children(p)):
-                active[columns[p]] = None
-        through = {
-            idx for idx, p in enumerate(active) if p and idx != at and idx not in down
-        }
+        occupied.difference_update(finished)
+        through = occupied - down
+        through.discard(at)
         if dag.children(b):
-            while len(active) <= at:
-                active.append(None)
-            active[at] = b
-        up = {idx for idx, p in enumerate(active) if p and idx not in through}
-        while active and active[-1] is None:
-            active.pop()
+            occupied.add(at)
+            width = max(width, at + 1)
+        up = occupied - through
+        while width and width - 1 not in occupied:
+            width -= 1
         grid.append((NodeArt(at, up=up, down=down, through=through), b))
     grid.reverse()
     return grid
@@ -351,6 +468,104 @@ def priority_key[C: HasLessThan | HasGreaterThan](
     return [*takewhile(lt(node_key), blocked_key), node_key]
 
 
+class PriorityKey:
+    """A priority_key over integer ranks, interned in a trie of shared prefixes.
+
+    Each key is a node in the trie, sharing its prefix with every key it was
+    derived from, so deep upstream chains take linear rather than quadratic
+    memory. Each node stores the minimum value on its path and a skew-binary
+    jump pointer, so prefixes and common ancestors are found in logarithmic
+    time. Once all keys are built, rank_keys numbers them in lexicographic
+    order, turning each comparison in the final sort into an integer one.
+
+    >>> root = PriorityKey()
+    >>> root.extend(2) < root.extend(3)
+    True
+    >>> root.extend(3).extend(1).values()
+    [3, 1]
+    """
+
+    __slots__ = ("parent", "value", "depth", "min", "jump", "children", "rank")
+
+    def __init__(self, parent: PriorityKey | None = None, value: int = -1) -> None:
+        self.parent = parent
+        self.value = value
+        self.children: dict[int, PriorityKey] = {}
+        self.rank = 0
+        if parent is None:
+            self.depth = 0
+            self.min = value
+            self.jump = self
+        else:
+            self.depth = parent.depth + 1
+            self.min = value if parent.parent is None else min(parent.min, value)
+            jump = parent.jump
+            if parent.depth - jump.depth == jump.depth - jump.jump.depth:
+                self.jump = jump.jump
+            else:
+                self.jump = parent
+
+    def _parent(self) -> PriorityKey:
+        assert self.parent is not None
+        return self.parent
+
+    def child(self, value: int) -> PriorityKey:
+        try:
+            return self.children[value]
+        except KeyError:
+            child = self.children[value] = PriorityKey(self, value)
+            return child
+
+    def ancestor(self, depth: int) -> PriorityKey:
+        node = self
+        while node.depth > depth:
+            node = node.jump if node.jump.depth >= depth else node._parent()
+        return node
+
+    def extend(self, value: int) -> PriorityKey:
+        """The priority key of a node with this value blocked by this key."""
+        # Find the longest prefix whose values are all larger than value
+        node = self
+        while node.parent is not None and node.min <= value:
+            jump = node.jump
+            if jump.parent is not None and jump.min <= value:
+                node = jump
+            else:
+                node = node._parent()
+        return node.child(value)
+
+    def values(self) -> list[int]:
+        values = []
+        node = self
+        while node.parent is not None:
+            values.append(node.value)
+            node = node.parent
+        values.reverse()
+        return values
+
+    def __lt__(self, other: PriorityKey) -> bool:
+        a = self.ancestor(other.depth)
+        b = other.ancestor(self.depth)
+        if a is b:
+            return self.depth < other.depth
+        while a.parent is not b.parent:
+            if a.jump is not b.jump:
+                a, b = a.jump, b.jump
+            else:
+                a, b = a._parent(), b._parent()
+        return a.value < b.value
+
+    def rank_keys(self) -> None:
+        """Number this key and its extensions in lexicographic order."""
+        rank = 0
+        todo = [self]
+        while todo:
+            node = todo.pop()
+            node.rank = rank
+            rank += 1
+            todo.extend(node.children[v] for v in sorted(node.children, reverse=True))
+
+
 @overload
 def partially_ordered[T, C: HasLessThan | HasGreaterThan](
     dag: DAG[T],
@@ -375,39 +590,48 @@ def partially_ordered[T, C: HasLessThan | HasGreaterThan](
     given) will be preferentially placed first, all other things being equal.
     """
     keys: dict[T, C] = {node: key(node) if key else cast(C, node) for node in dag}
-    priority_keys: dict[T, tuple[C, list[C]]] = {}
-    remaining = set(dag)
-
-    while remaining:
-        some_node = next(iter(remaining))
-        todo = deque(reachable_from(some_node, dag.parents, dag.children))
-        todo.append(some_node)
-        cluster_key = max(keys[node] for node in todo)
-        seen = set()  # Loop detection
-
-        while todo:
-            node = todo.pop()
-            if node not in remaining:
-                continue
-            missing = [p for p in dag.parents(node) if p in remaining]
-            if missing and node not in seen:
-                seen.add(node)
-                todo.append(node)
-                todo.extend(missing)
-            else:
-                # If node in seen, we have a loop; fail gracefully
-                pkey: list[C] = priority_key(
-                    keys[node],
-                    (
-                        priority_keys[p][1]
-                        for p in dag.parents(node)
-                        if p in priority_keys
-                    ),
-                )
-                priority_keys[node] = (cluster_key, pkey)
-                remaining.remove(node)
-
-    return sorted(priority_keys, key=priority_keys.__getitem__, reverse=True)
+    ranks = key_ranks(keys)
+    cluster_ranks: dict[T, int] = {}
+    for node in dag:
+        root = dag.component(node)
+        cluster_ranks[root] = max(cluster_ranks.get(root, -1), ranks[node])
+
+    # Kahn's algorithm: a node's priority key is computed once all its parents' are
+    missing = {node: len(dag.parents(node)) for node in dag}
+    todo = deque(node for node, count in missing.items() if not count)
+    no_key = PriorityKey()
+    priority_keys: dict[T, PriorityKey] = {}
+    while todo:
+        node = todo.popleft()
+        blocked_key = max((priority_keys[p] for p in dag.parents(node)), default=no_key)
+        priority_keys[node] = blocked_key.extend(ranks[node])
+        for child in dag.children(node):
+            missing[child] -= 1
+            if not missing[child]:
+                todo.append(child)
+
+    no_key.rank_keys()
+    return sorted(
+        priority_keys,
+        key=lambda node: (
+            cluster_ranks[dag.component(node)],
+            priority_keys[node].rank,
+        ),
+        reverse=True,
+    )
+
+
+def key_ranks[T, C: HasLessThan | HasGreaterThan](keys: Mapping[T, C]) -> dict[T, int]:
+    """Replace keys with integer ranks that compare the same way."""
+    ranks: dict[T, int] = {}
+    rank = -1
+    previous: C | None = None
+    for node in sorted(keys, key=keys.__getitem__):
+        if previous is None or lt(previous)(keys[node]):
+            rank += 1
+            previous = keys[node]
+        ranks[node] = rank
+    return ranks
 
 
 def sanitized_parents[T](
@@ -439,4 +663,29 @@ def layout[T, C: HasLessThan | HasGreaterThan](
     return add_node_art(node_list, dag)
 
 
-__all__ = ["layout"]
+class IncrementalLayout[T, C: HasLessThan | HasGreaterThan]:
+    """Lays out successive DAGs, reusing the previous layout where possible.
+
+    If neither the DAG nor any node's key has changed since the last call,
+    the previous layout is returned, with nodes replaced by the equal nodes
+    of the new DAG.
+    """
+
+    def __init__(self, key: Callable[[T], C]) -> None:
+        self.key = key
+        self._dag: DAG[T] | None = None
+        self._keys: dict[T, C] = {}
+        self._layout: list[tuple[NodeArt, T]] = []
+
+    def __call__(self, dag: DAG[T]) -> list[tuple[NodeArt, T]]:
+        keys = {node: self.key(node) for node in dag}
+        if dag == self._dag and keys == self._keys:
+            current = {node: node for node in dag}
+            return [(art, current[node]) for art, node in self._layout]
+        self._layout = layout(dag, keys.__getitem__)
+        self._dag = dag
+        self._keys = keys
+        return self._layout
+
+
+__all__ = ["IncrementalLayout", "layout"]
@@ -1,14 +1,27 @@
 # coding=utf-8
+import asyncio
+import os
+import re
+import shutil
+import sys
+import unicodedata
 from argparse import Namespace
+from concurrent.futures import Executor
+from datetime import date, timedelta
 from enum import Enum
-from typing import Any, Iterable
+from typing import Any, Callable, Collection, Iterable, Iterator, TextIO
 
 from ansi import color
 
-from .dag import NodeArt
+from .dag import DAG, NodeArt
+from .git.bitmap import BranchBitmapIndex
 from .git.branch import Branch, RemoteBranch
-from .git.commit_algos import unmerged_commits
+from .git.branch_algos import HistoryHorizon
+from .git.commit import Commit
 from .git.config import remote_push_default
+from .git.pack import packs
+from .git.reachability import ReachabilityCache
+from .pool import parallel_map, submit
 
 
 class Config(Namespace):
@@ -17,6 +30,12 @@ class Config(Namespace):
     remote_icons: bool
     watch: bool = False
     poll_every: float = 1.0
+    history_horizon: timedelta | None = None
+    reachability_bitmaps: bool = False
+    max_unmerged: int | None = None
+    max_rows: int | None = None
+    progressive: bool = False
+    jobs: int | None = None
 
     def __init__(self, *, is_tty: bool = False, **kwargs: Any) -> None:
         defaults = {"color": is_tty, "remote_icons": is_tty}
@@ -29,6 +48,12 @@ class SyncStatus(Enum):
     IN_SYNC = "IN_SYNC"
 
 
+# ANSI sequences, rendered once rather than on every row
+RESET = str(color.fx.reset)
+UNMERGED_COLOR = str(color.fg.boldred)
+NOTE_COLOR = str(color.fg.grey)
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-?]*[ -/]*[@-~]")
+
 SYNC_STATUS_ICON = {
     SyncStatus.NO_REMOTE: "",
     SyncStatus.OUT_OF_SYNC: " 🔶",
@@ -62,16 +87,69 @@ def remote_sync_status(b: Branch) -> SyncStatus:
     return SyncStatus.IN_SYNC if has_remote else SyncStatus.NO_REMOTE
 
 
-def compute_unmerged(b: Branch, parents: Iterable[Branch]) -> int:
-    parent_commits = [p.commit for p in parents]
-    return sum(1 for _ in unmerged_commits(b.commit, *parent_commits))
+def reachability_queries(
+    dag: DAG[Branch], config: Config, rows: Iterable[Branch] | None = None
+) -> Iterator[tuple[Commit, list[Commit]]]:
+    """The reachability queries print_branch will make for the given rows.
+
+    Defaults to every branch in the DAG.
+    """
+    for b in dag if rows is None else rows:
+        yield (b.commit, [p.commit for p in dag.parents(b)])
+        if config.color and isinstance(b.upstream, Branch):
+            yield (b.upstream.commit, [b.commit])
 
 
-def compute_branch_color(b: Branch) -> object | None:
+def prefetch_reachability(
+    dag: DAG[Branch],
+    config: Config,
+    bitmaps: BranchBitmapIndex | None = None,
+    rows: Collection[Branch] | None = None,
+) -> ReachabilityCache:
+    """Answer every row's reachability queries with one shared traversal.
+
+    If bitmaps are given, queries between a branch and its upstream are
+    answered from them instead. If rows are given, only those branches will
+    be displayed, so only their queries are answered up front.
+    """
+    branches = list(dag) if rows is None else list(rows)
+    reachability = new_reachability(config, dag, branches, bitmaps)
+    reachability.prefetch(reachability_queries(dag, config, branches))
+    return reachability
+
+
+def new_reachability(
+    config: Config,
+    dag: DAG[Branch],
+    rows: list[Branch],
+    bitmaps: BranchBitmapIndex | None = None,
+) -> ReachabilityCache:
+    """A reachability cache, primed from the rows' bitmaps if given.
+
+    Bitmaps are kept for every branch in the DAG, not just the rows being
+    recomputed, so unchanged branches can be updated incrementally once
+    their tips move.
+    """
+    reachability = ReachabilityCache(bitmaps=packs(), limit=config.max_unmerged)
+    if bitmaps is not None:
+        bitmaps.retain(list(dag))
+        for b in rows:
+            if isinstance(b.upstream, Branch):
+                reachability.prime(bitmaps.bitmap(b, b.commit, b.upstream.commit))
+    return reachability
+
+
+def compute_unmerged(
+    b: Branch, parents: Iterable[Branch], reachability: ReachabilityCache
+) -> int:
+    return reachability.unmerged_count(b.commit, *(p.commit for p in parents))
+
+
+def compute_branch_color(b: Branch, reachability: ReachabilityCache) -> object | None:
     if b.is_head:
         return color.fg.boldmagenta
-    if isinstance(b.upstream, Branch) and not any(
-        unmerged_commits(b.upstream.commit, b.commit)
+    if isinstance(b.upstream, Branch) and reachability.is_merged(
+        b.commit, b.upstream.commit
     ):
         # If all commits are merged into the upstream branch, and the upstream is not a remote branch,
         # display the branch in grey to show it is safe to delete.
@@ -79,33 +157,345 @@ def compute_branch_color(b: Branch) -> object | None:
     return None
 
 
-def print_branch(
+type RowSignature = tuple[object, ...]
+
+
+def row_signature(
+    art: NodeArt, b: Branch, parents: Iterable[Branch], worktree_branches: set[str]
+) -> RowSignature:
+    """Everything about a row that format_branch depends on."""
+    upstream = b.upstream
+    push_remote = remote_push_default()
+    downstream = RemoteBranch(push_remote, b.name) if push_remote else None
+    return (
+        art,
+        b,
+        b.commit,
+        b.is_head,
+        b.name in worktree_branches,
+        upstream,
+        upstream.commit if upstream else None,
+        downstream.commit if downstream and downstream.exists() else None,
+        tuple(p.commit for p in parents),
+    )
+
+
+class RowCache:
+    """Formatted rows from the previous refresh, keyed by their signatures.
+
+    Rows whose signature is unchanged are reused without recomputing their
+    sync status, colour or unmerged count.
+    """
+
+    def __init__(self) -> None:
+        self._rows: dict[RowSignature, str] = {}
+
+    def _signatures(
+        self,
+        rows: list[tuple[NodeArt, Branch]],
+        dag: DAG[Branch],
+        worktree_branches: set[str],
+    ) -> list[RowSignature]:
+        return [
+            row_signature(art, b, dag.parents(b), worktree_branches) for art, b in rows
+        ]
+
+    def format_rows(
+        self,
+        rows: list[tuple[NodeArt, Branch]],
+        dag: DAG[Branch],
+        config: Config,
+        worktree_branches: set[str],
+        bitmaps: BranchBitmapIndex | None = None,
+        executor: Executor | None = None,
+    ) -> list[str]:
+        """Format rows, reusing unchanged rows from the previous refresh.
+
+        If an executor is given, the shared reachability traversal runs on it
+        concurrently with every changed row's remote sync status check.
+        """
+        signatures = self._signatures(rows, dag, worktree_branches)
+        stale = [b for (_, b), sig in zip(rows, signatures) if sig not in self._rows]
+        if executor is None:
+            reachability = prefetch_reachability(dag, config, bitmaps, rows=stale)
+            statuses = {}
+        else:
+            future = submit(
+                executor, prefetch_reachability, dag, config, bitmaps, rows=stale
+            )
+            statuses = (
+                dict(
+                    zip(
+                        stale,
+                        parallel_map(remote_sync_status, stale, executor=executor),
+                    )
+                )
+                if config.remote_icons
+                else {}
+            )
+            reachability = future.result()
+        lines = [
+            self._rows[sig]
+            if sig in self._rows
+            else format_branch(
+                art,
+                b,
+                config,
+                dag.parents(b),
+                reachability,
+                worktree_branches,
+                statuses.get(b),
+            )
+            for (art, b), sig in zip(rows, signatures)
+        ]
+        self._rows = dict(zip(signatures, lines))
+        return lines
+
+    async def format_rows_progressively(
+        self,
+        rows: list[tuple[NodeArt, Branch]],
+        dag: DAG[Branch],
+        config: Config,
+        worktree_branches: set[str],
+        *,
+        executor: Executor,
+        on_update: Callable[[list[str | None]], None],
+        bitmaps: BranchBitmapIndex | None = None,
+    ) -> list[str]:
+        """Like format_rows, but formats changed rows concurrently on executor.
+
+        on_update is called with the rows known so far (None for rows still
+        being computed) once up front, then again as rows complete. Rows are
+        walked individually rather than in one shared traversal, so each can
+        be shown as soon as it is ready.
+        """
+        signatures = self._signatures(rows, dag, worktree_branches)
+        lines = [self._rows.get(sig) for sig in signatures]
+        stale = [i for i, line in enumerate(lines) if line is None]
+        reachability = new_reachability(
+            config, dag, [rows[i][1] for i in stale], bitmaps
+        )
+        tasks: dict[asyncio.Future[str], int] = {}
+        for i in stale:
+            art, b = rows[i]
+            future = submit(
+                executor,
+                format_branch,
+                art,
+                b,
+                config,
+                dag.parents(b),
+                reachability,
+                worktree_branches,
+            )
+            tasks[asyncio.wrap_future(future)] = i
+        on_update(lines)
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                lines[tasks[task]] = task.result()
+            on_update(lines)
+        result = [line for line in lines if line is not None]
+        self._rows = dict(zip(signatures, result))
+        return result
+
+
+def format_skeleton(art: NodeArt, b: Branch, worktree_branches: set[str]) -> str:
+    """A row's art and branch name, drawn before its details are computed."""
+    tree = " 🌲" if b.name in worktree_branches else ""
+    return f"{art}  {b}{tree}"
+
+
+def max_details_width(config: Config) -> int:
+    """An upper bound on the columns format_branch adds to a row's skeleton."""
+    icon = max(map(display_width, SYNC_STATUS_ICON.values()))
+    if config.max_unmerged is not None:
+        count = f"{config.max_unmerged}+"
+    else:
+        count = "9" * 10
+    return (icon if config.remote_icons else 0) + len(f" [{count} unmerged]")
+
+
+def format_branch(
     art: NodeArt,
     b: Branch,
     config: Config,
     parents: Iterable[Branch],
+    reachability: ReachabilityCache,
     worktree_branches: set[str],
-) -> None:
-    print(f"{art}  ", end="")
+    sync_status: SyncStatus | None = None,
+) -> str:
+    """Format a branch's row; its sync status is computed unless given."""
+    parts = [f"{art}  "]
     reset = False
     if config.color:
-        branch_color = compute_branch_color(b)
+        branch_color = compute_branch_color(b, reachability)
         if branch_color is not None:
-            print(branch_color, end="")
+            parts.append(str(branch_color))
             reset = True
-    print(b, end="")
+    parts.append(str(b))
     if reset:
-        print(color.fx.reset, end="")
+        parts.append(RESET)
     if b.name in worktree_branches:
-        print(" 🌲", end="")
+        parts.append(" 🌲")
     if config.remote_icons:
-        print(SYNC_STATUS_ICON[remote_sync_status(b)], end="")
+        parts.append(SYNC_STATUS_ICON[sync_status or remote_sync_status(b)])
 
-    unmerged = compute_unmerged(b, parents)
+    unmerged = compute_unmerged(b, parents, reachability)
     if unmerged > 0:
         if config.color:
-            print(color.fg.boldred, end="")
-        print(f" [{unmerged} unmerged]", end="")
+            parts.append(UNMERGED_COLOR)
+        if config.max_unmerged is not None and unmerged > config.max_unmerged:
+            parts.append(f" [{config.max_unmerged}+ unmerged]")
+        else:
+            parts.append(f" [{unmerged} unmerged]")
         if config.color:
-            print(color.fx.reset, end="")
-    print()
+            parts.append(RESET)
+    return "".join(parts)
+
+
+def format_note(note: str, config: Config) -> str:
+    if config.color:
+        return f"{NOTE_COLOR}{note}{RESET}"
+    return note
+
+
+def format_horizon_note(horizon: HistoryHorizon, config: Config) -> str:
+    cutoff = date.fromtimestamp(horizon.timestamp).isoformat()
+    return format_note(f"(history before {cutoff} ignored)", config)
+
+
+def format_elided_note(count: int, config: Config) -> str:
+    branches = "branch" if count == 1 else "branches"
+    return format_note(f"({count} more {branches} not shown)", config)
+
+
+def write_frame(lines: list[str], out: TextIO | None = None) -> None:
+    """Write lines to stdout (or out) as a single buffer, then flush."""
+    out = out or sys.stdout
+    out.write("".join(f"{line}\n" for line in lines))
+    out.flush()
+
+
+def display_width(line: str) -> int:
+    """The number of terminal columns line takes up, ignoring ANSI sequences."""
+    width = 0
+    for c in ANSI_ESCAPE.sub("", line):
+        if unicodedata.category(c) in ("Mn", "Me", "Cf"):
+            continue
+        width += 2 if unicodedata.east_asian_width(c) in ("W", "F") else 1
+    return width
+
+
+def fits_terminal(widths: Collection[int], size: os.terminal_size) -> bool:
+    """Whether lines of the given widths can be addressed by row on a terminal.
+
+    The last line is left free for the cursor, and the last column free so
+    that no line wraps.
+    """
+    return len(widths) < size.lines and all(width < size.columns for width in widths)
+
+
+class Screen:
+    """Repaints a terminal, rewriting only the lines that changed.
+
+    The first frame clears the screen; later frames move the cursor to each
+    changed line and rewrite it, then clear anything below the new frame. A
+    change in terminal size forces a full repaint, as does a frame that does
+    not fit on the terminal, since wrapped or scrolled lines can no longer be
+    addressed by row.
+
+    If inline is true, the first frame is instead written at the cursor, and
+    later frames address lines relative to the end of it. This only works
+    while the whole frame fits on the terminal.
+    """
+
+    def __init__(self, out: TextIO | None = None, *, inline: bool = False) -> None:
+        self._out = out
+        self._inline = inline
+        self._lines: list[str] | None = None
+        self._size: os.terminal_size | None = None
+
+    def render(self, lines: list[str]) -> None:
+        size = shutil.get_terminal_size()
+        painted: list[str] | None = lines
+        if self._inline:
+            parts = self._inline_parts(lines)
+        elif self._fits(lines, size):
+            parts = self._absolute_parts(lines, size)
+        else:
+            parts = ["\x1b[2J\x1b[H", *(f"{line}\n" for line in lines)]
+            painted = None  # Rows are unknown, so repaint the next frame in full
+        out = self._out or sys.stdout
+        out.write("".join(parts))
+        out.flush()
+        self._lines = painted
+        self._size = size
+
+    @staticmethod
+    def _fits(lines: list[str], size: os.terminal_size) -> bool:
+        return fits_terminal([display_width(line) for line in lines], size)
+
+    def _absolute_parts(self, lines: list[str], size: os.terminal_size) -> list[str]:
+        parts = []
+        previous = self._lines
+        if previous is None or size != self._size:
+            parts.append("\x1b[2J")
+            previous = []
+        for row, line in enumerate(lines, start=1):
+            if row > len(previous) or previous[row - 1] != line:
+                parts.append(f"\x1b[{row};1H{line}\x1b[K")
+        if len(lines) < len(previous):
+            parts.append(f"\x1b[{len(lines) + 1};1H\x1b[J")
+        parts.append(f"\x1b[{len(lines) + 1};1H")
+        return parts
+
+    def _inline_parts(self, lines: list[str]) -> list[str]:
+        # The cursor starts at the beginning of the line after the last frame
+        previous = self._lines or []
+        parts = []
+        cursor = len(previous)
+
+        def move_to(row: int) -> None:
+            nonlocal cursor
+            if row < cursor:
+                parts.append(f"\x1b[{cursor - row}A")
+            elif row > cursor:
+                parts.append(f"\x1b[{row - cursor}B")
+            parts.append("\r")
+            cursor = row
+
+        common = min(len(lines), len(previous))
+        for row in range(common):
+            if previous[row] != lines[row]:
+                move_to(row)
+                parts.append(f"{lines[row]}\x1b[K")
+        move_to(common)
+        if len(lines) < len(previous):
+            parts.append("\x1b[J")
+        parts.extend(f"{line}\n" for line in lines[common:])
+        return parts
+
+
+class OrderedLines:
+    """Writes lines to stdout (or out) in order, as they become available."""
+
+    def __init__(self, out: TextIO | None = None) -> None:
+        self._out = out
+        self._written = 0
+
+    def update(self, lines: list[str | None]) -> None:
+        parts = []
+        while self._written < len(lines):
+            line = lines[self._written]
+            if line is None:
+                break
+            parts.append(f"{line}\n")
+            self._written += 1
+        if parts:
+            out = self._out or sys.stdout
+            out.write("".join(parts))
+            out.flush()
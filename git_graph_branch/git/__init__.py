@@ -1,10 +1,12 @@
 from .branch import Branch, RemoteBranch, branches, worktree_branches
-from .branch_algos import compute_branch_dag
+from .branch_algos import HistoryHorizon, IncrementalBranchDag, compute_branch_dag
 from .commit import Commit
 
 __all__ = [
     "Branch",
     "Commit",
+    "HistoryHorizon",
+    "IncrementalBranchDag",
     "RemoteBranch",
     "branches",
     "compute_branch_dag",
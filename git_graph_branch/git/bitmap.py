@@ -0,0 +1,225 @@
+"""Per-branch reachability bitmaps.
+
+Every commit seen is assigned a small integer index, and sets of commits
+are stored as Python ints with one bit per index. For each branch we keep
+the commits reachable from its tip but not its upstream, and vice versa,
+so merge and unmerged queries reduce to bit counts. Bitmaps are kept
+across frames and extended in place when a tip advances by ordinary
+commits.
+"""
+
+from collections.abc import Collection, Iterator
+from dataclasses import dataclass
+
+from ..bits import set_bits
+from .branch import Branch
+from .commit import Commit, MissingCommit
+from .commit_algos import CommitMap
+
+TIP = 1
+BASE = 2
+BOTH = TIP | BASE
+
+
+class CommitIndex:
+    """Assigns each commit a stable integer index."""
+
+    def __init__(self) -> None:
+        self._indices: dict[Commit, int] = {}
+        self._commits: list[Commit] = []
+
+    def __len__(self) -> int:
+        return len(self._commits)
+
+    def bit(self, commit: Commit) -> int:
+        """The single-bit bitset containing commit."""
+        index = self._indices.get(commit)
+        if index is None:
+            index = len(self._commits)
+            self._indices[commit] = index
+            self._commits.append(commit)
+        return 1 << index
+
+    def commits(self, bits: int) -> Iterator[Commit]:
+        """The commits in a bitset."""
+        for index in set_bits(bits):
+            yield self._commits[index]
+
+
+@dataclass(frozen=True)
+class BranchBitmap:
+    """Commits that differ between a branch tip and its upstream (the base).
+
+    ahead holds commits reachable from tip but not base, and ahead_fp the
+    subset on tip's first-parent chain; behind and behind_fp likewise for
+    base.
+    """
+
+    tip: Commit
+    base: Commit
+    ahead: int
+    behind: int
+    ahead_fp: int
+    behind_fp: int
+
+    @property
+    def ahead_count(self) -> int:
+        """First-parent commits on tip not reachable from base."""
+        return self.ahead_fp.bit_count()
+
+    @property
+    def behind_count(self) -> int:
+        """First-parent commits on base not reachable from tip."""
+        return self.behind_fp.bit_count()
+
+
+def paint(
+    tip: Commit, base: Commit, *, window_size_secs: int = 60
+) -> dict[Commit, int]:
+    """Colour commits by whether they are reachable from tip, base or both.
+
+    Walks in date order until every commit left to visit is reachable from
+    both, then a little further to allow for clock skew. Commits not in the
+    result are reachable from both.
+    """
+    colours: dict[Commit, int] = {}
+    todo: CommitMap[int] = CommitMap()
+    # Commits in todo not yet known to be reachable from both
+    live: set[Commit] = set()
+
+    def mark(commit: Commit, colour: int) -> None:
+        old = colours.get(commit, 0)
+        if colour & ~old:
+            colours[commit] = old | colour
+            todo[commit] = old | colour
+            if old | colour == BOTH:
+                live.discard(commit)
+            else:
+                live.add(commit)
+
+    mark(tip, TIP)
+    mark(base, BASE)
+    stop_date = max(tip.commit_date, base.commit_date) - window_size_secs
+    while todo:
+        if not live and todo.peek().commit_date < stop_date:
+            break
+        commit, _ = todo.popitem()
+        live.discard(commit)
+        colour = colours[commit]
+        if colour != BOTH:
+            stop_date = commit.commit_date - window_size_secs
+        for parent in commit.available_parents():
+            mark(parent, colour)
+    return colours
+
+
+def first_parents_while(
+    commit: Commit, colours: dict[Commit, int], colour: int
+) -> Iterator[Commit]:
+    c: Commit | None = commit
+    while c is not None and colours.get(c) == colour:
+        yield c
+        try:
+            c = c.first_parent
+        except MissingCommit:
+            return
+
+
+def compute_bitmap(
+    tip: Commit, base: Commit, index: CommitIndex, *, window_size_secs: int = 60
+) -> BranchBitmap:
+    colours = paint(tip, base, window_size_secs=window_size_secs)
+    bits = {TIP: 0, BASE: 0}
+    for commit, colour in colours.items():
+        if colour != BOTH:
+            bits[colour] |= index.bit(commit)
+    return BranchBitmap(
+        tip=tip,
+        base=base,
+        ahead=bits[TIP],
+        behind=bits[BASE],
+        ahead_fp=sum(index.bit(c) for c in first_parents_while(tip, colours, TIP)),
+        behind_fp=sum(index.bit(c) for c in first_parents_while(base, colours, BASE)),
+    )
+
+
+def new_commits(old: Commit, new: Commit, *, limit: int) -> list[Commit] | None:
+    """The commits added when old advanced to new by ordinary commits.
+
+    Returns None if new does not reach old through at most limit
+    single-parent commits.
+    """
+    commits: list[Commit] = []
+    commit = new
+    while commit != old:
+        if len(commits) >= limit:
+            return None
+        try:
+            parents = commit.parents
+        except MissingCommit:
+            return None
+        if len(parents) != 1:
+            return None
+        commits.append(commit)
+        commit = parents[0]
+    return commits
+
+
+class BranchBitmapIndex:
+    """Reachability bitmaps for each branch and its upstream, kept across frames."""
+
+    def __init__(
+        self, *, window_size_secs: int = 60, max_incremental_commits: int = 1000
+    ) -> None:
+        self.commits = CommitIndex()
+        self.window_size_secs = window_size_secs
+        self.max_incremental_commits = max_incremental_commits
+        self._bitmaps: dict[Branch, BranchBitmap] = {}
+
+    def bitmap(self, branch: Branch, tip: Commit, base: Commit) -> BranchBitmap:
+        """The bitmap for branch, updating the previous one where possible."""
+        old = self._bitmaps.get(branch)
+        bitmap = self._advance(old, tip, base) if old else None
+        if bitmap is None:
+            bitmap = compute_bitmap(
+                tip, base, self.commits, window_size_secs=self.window_size_secs
+            )
+        self._bitmaps[branch] = bitmap
+        return bitmap
+
+    def retain(self, branches: Collection[Branch]) -> None:
+        """Drop bitmaps for branches that no longer exist."""
+        for branch in self._bitmaps.keys() - set(branches):
+            del self._bitmaps[branch]
+
+    def _advance(
+        self, old: BranchBitmap, tip: Commit, base: Commit
+    ) -> BranchBitmap | None:
+        """Extend old to a new tip and base, if both advanced by ordinary commits.
+
+        This is only valid if the old tip was not reachable from the old base
+        (and vice versa), as then no new commit can be reachable from the
+        other side.
+        """
+        added = {}
+        for side, old_end, new_end, side_bits in [
+            (TIP, old.tip, tip, old.ahead),
+            (BASE, old.base, base, old.behind),
+        ]:
+            if new_end == old_end:
+                added[side] = 0
+                continue
+            if not side_bits & self.commits.bit(old_end):
+                return None
+            commits = new_commits(old_end, new_end, limit=self.max_incremental_commits)
+            if commits is None:
+                return None
+            added[side] = sum(self.commits.bit(c) for c in commits)
+        return BranchBitmap(
+            tip=tip,
+            base=base,
+            ahead=old.ahead | added[TIP],
+            behind=old.behind | added[BASE],
+            ahead_fp=old.ahead_fp | added[TIP],
+            behind_fp=old.behind_fp | added[BASE],
+        )
@@ -1,7 +1,9 @@
+from concurrent.futures import Executor
 from heapq import heapify, heappop, heappush
-from typing import Iterator
+from typing import Collection, Iterator
 
 from git_graph_branch.dag import DAG
+from git_graph_branch.pool import parallel_map, prefetched
 
 from .branch import Branch, RemoteBranch
 from .commit import Commit
@@ -9,12 +11,33 @@ from .commit_algos import (
     CommitMap,
     CommitSet,
     CommitSetMultimap,
+    FirstParentJumps,
     merge_reverse_chronological,
     range,
 )
 from .reflog import ReflogEntry
 
 
+class HistoryHorizon:
+    """A cut-off time, before which reflog entries and merges are ignored.
+
+    Records whether anything was actually cut off, so it can be reported.
+    """
+
+    def __init__(self, timestamp: int) -> None:
+        self.timestamp = timestamp
+        self.truncated = False
+
+    def __repr__(self) -> str:
+        return f"HistoryHorizon({self.timestamp})"
+
+    def includes(self, timestamp: int) -> bool:
+        if timestamp >= self.timestamp:
+            return True
+        self.truncated = True
+        return False
+
+
 class ChronoReflog:
     def __init__(
         self, branch: Branch, *, reflog_iter: Iterator[ReflogEntry] | None = None
@@ -60,13 +83,27 @@ class WindowedFirstBranchReferences:
 
     Must be accessed in approximately reverse-chronological order, as each access
     will shift the window of visibility backwards.
+
+    Reflog entries older than the horizon, if given, are ignored.
+
+    If an executor is given, the most recent entry of every reflog is read on it in
+    parallel up front; older entries are still read lazily, as they are needed.
     """
 
-    def __init__(self, branches: list[Branch], *, window_size_secs: int = 60) -> None:
+    def __init__(
+        self,
+        branches: list[Branch],
+        *,
+        window_size_secs: int = 60,
+        horizon: HistoryHorizon | None = None,
+        executor: Executor | None = None,
+    ) -> None:
         self.window_size_secs = window_size_secs
+        self.horizon = horizon
 
         # Yet-to-be-processed reflogs
-        self.reflogs = [ChronoReflog(b) for b in branches]
+        reflogs = parallel_map(ChronoReflog, branches, executor=executor)
+        self.reflogs = [r for r in reflogs if self._in_horizon(r)]
         heapify(self.reflogs)
 
         # Yet-to-be-processed commits
@@ -76,6 +113,9 @@ class WindowedFirstBranchReferences:
         # reflog that the commit is reachable from
         self.refs: CommitMap[ChronoReflog] = CommitMap()
 
+    def _in_horizon(self, reflog: ChronoReflog) -> bool:
+        return self.horizon is None or self.horizon.includes(reflog.reflog.timestamp)
+
     def _add_commit_todo(self, reflog: ChronoReflog, commit: Commit) -> None:
         if commit not in self.refs:
             self.refs[commit] = reflog
@@ -87,7 +127,7 @@ class WindowedFirstBranchReferences:
         while self.reflogs and self.reflogs[0].reflog.timestamp >= ts:
             reflog = heappop(self.reflogs)
             next_reflog = reflog.next()
-            if next_reflog:
+            if next_reflog and self._in_horizon(next_reflog):
                 heappush(self.reflogs, next_reflog)
             self._add_commit_todo(reflog, reflog.reflog.commit)
 
@@ -105,35 +145,108 @@ class WindowedFirstBranchReferences:
         return self.refs[key].branch if key in self.refs else None
 
 
-def upstream_range(branch: Branch) -> Iterator[tuple[Commit, Branch]]:
+def upstream_range(
+    branch: Branch,
+    *,
+    horizon: HistoryHorizon | None = None,
+    jumps: FirstParentJumps | None = None,
+) -> Iterator[tuple[Commit, Branch]]:
     if branch.upstream is not None:
-        for commit in range(branch.upstream.commit, branch.commit):
+        for commit in range(branch.upstream.commit, branch.commit, jumps=jumps):
+            if horizon is not None and not horizon.includes(commit.commit_date):
+                return
+            yield (commit, branch)
+
+
+class UpstreamRangeCache:
+    """Caches upstream_range results across refreshes.
+
+    Each branch's range is reused until its tip, its upstream's tip or the
+    horizon changes. Ranges are walked using the given first-parent jump
+    pointers, if any.
+    """
+
+    def __init__(self, *, jumps: FirstParentJumps | None = None) -> None:
+        self.jumps = jumps
+        self._ranges: dict[Branch, tuple[tuple[object, ...], list[Commit], bool]] = {}
+        self.walks = 0
+
+    def __call__(
+        self, branch: Branch, *, horizon: HistoryHorizon | None = None
+    ) -> Iterator[tuple[Commit, Branch]]:
+        if branch.upstream is None:
+            return
+        key = (
+            branch.commit,
+            branch.upstream.commit,
+            horizon.timestamp if horizon else None,
+        )
+        cached = self._ranges.get(branch)
+        if cached is None or cached[0] != key:
+            walk_horizon = HistoryHorizon(horizon.timestamp) if horizon else None
+            commits = [
+                c
+                for c, _ in upstream_range(
+                    branch, horizon=walk_horizon, jumps=self.jumps
+                )
+            ]
+            truncated = walk_horizon is not None and walk_horizon.truncated
+            cached = (key, commits, truncated)
+            self._ranges[branch] = cached
+            self.walks += 1
+        if horizon is not None and cached[2]:
+            horizon.truncated = True
+        for commit in cached[1]:
             yield (commit, branch)
 
+    def retain(self, branches: Collection[Branch]) -> None:
+        """Drop cached ranges for branches that no longer exist."""
+        for branch in self._ranges.keys() - set(branches):
+            del self._ranges[branch]
 
-def merge_commits(branches: list[Branch]) -> Iterator[tuple[Commit, Branch]]:
+
+def merge_commits(
+    branches: list[Branch],
+    *,
+    horizon: HistoryHorizon | None = None,
+    ranges: UpstreamRangeCache | None = None,
+    executor: Executor | None = None,
+) -> Iterator[tuple[Commit, Branch]]:
     """Yields a reverse chronological merge history for branches.
 
     Each commit merged into the first-parent route between each branch and its upstream
-    will be yielded, ordered by the merged commit, most recent first.
+    will be yielded, ordered by the merged commit, most recent first. Merges made
+    before the horizon, if given, are ignored. If a range cache is given, first-parent
+    routes are read from it.
+
+    If an executor is given, each branch's first-parent route is walked on it,
+    a chunk at a time ahead of the merge, so cold commits are inflated in parallel.
     """
     merge_commits: CommitSetMultimap[Branch] = CommitSetMultimap()
+    walk = ranges or upstream_range
+    walks = [walk(branch, horizon=horizon) for branch in branches]
+    if executor is not None:
+        walks = [prefetched(w, executor=executor) for w in walks]
 
-    for commit, branch in merge_reverse_chronological(
-        upstream_range(branch) for branch in branches
-    ):
+    for commit, branch in merge_reverse_chronological(walks):
         while merge_commits and merge_commits.peek().commit_date > commit.commit_date:
             yield merge_commits.popitem()
 
-        for merge_parent in commit.available_merge_parents():
-            merge_commits.add(merge_parent, branch)
+        if horizon is None or horizon.includes(commit.commit_date):
+            for merge_parent in commit.available_merge_parents():
+                merge_commits.add(merge_parent, branch)
 
     while merge_commits:
         yield merge_commits.popitem()
 
 
 def merge_histories(
-    branches: list[Branch], *, window_size_secs: int = 60
+    branches: list[Branch],
+    *,
+    window_size_secs: int = 60,
+    horizon: HistoryHorizon | None = None,
+    executor: Executor | None = None,
+    ranges: UpstreamRangeCache | None = None,
 ) -> Iterator[tuple[Branch, Branch]]:
     """Yields a reverse chronological join history for branches.
 
@@ -142,11 +255,13 @@ def merge_histories(
     by the timestamp of the merged/upstream commit.
     """
     references = WindowedFirstBranchReferences(
-        branches, window_size_secs=window_size_secs
+        branches, window_size_secs=window_size_secs, horizon=horizon, executor=executor
     )
     merges = (
         (commit, (merged_branch, branch))
-        for (commit, branch) in merge_commits(branches)
+        for (commit, branch) in merge_commits(
+            branches, horizon=horizon, ranges=ranges, executor=executor
+        )
         if (merged_branch := references.get(commit))
     )
     upstreams = [
@@ -161,7 +276,11 @@ def merge_histories(
 
 
 def compute_branch_dag(
-    branches: list[Branch], *, window_size_secs: int = 60
+    branches: list[Branch],
+    *,
+    window_size_secs: int = 60,
+    horizon: HistoryHorizon | None = None,
+    executor: Executor | None = None,
 ) -> DAG[Branch]:
     """Compute a DAG of merge and upstream connections between branches.
 
@@ -169,5 +288,92 @@ def compute_branch_dag(
     oldest links in the graph that are causing cycles. For instance, if branch
     A is branch B's upstream, but B was merged into A after it was forked from
     it, it will be shown as upstream of A, not the other way around.
+
+    If a horizon is given, merges and reflog entries older than it are ignored,
+    bounding the work done by recent activity rather than repository age.
+    Upstream connections are always included.
+
+    If an executor is given, independent per-branch reflog reads and first-parent
+    walks are run on it.
     """
-    return DAG(branches, merge_histories(branches, window_size_secs=window_size_secs))
+    return DAG(
+        branches,
+        merge_histories(
+            branches,
+            window_size_secs=window_size_secs,
+            horizon=horizon,
+            executor=executor,
+        ),
+        bitsets=True,
+    )
+
+
+type BranchSignature = tuple[Commit, int, Branch | RemoteBranch | None, Commit | None]
+
+
+def branch_signature(branch: Branch) -> BranchSignature:
+    """Everything about a branch that compute_branch_dag depends on."""
+    upstream = branch.upstream
+    return (
+        branch.commit,
+        branch.reflog_mtime(),
+        upstream,
+        upstream.commit if upstream else None,
+    )
+
+
+class IncrementalBranchDag:
+    """Computes the branch DAG across watch refreshes, reusing unchanged work.
+
+    If no branch's tip, reflog or upstream has changed, and the horizon is the
+    same, the previous DAG is reused. Otherwise, merge and upstream joins are
+    re-derived, as merge attribution depends on every branch's reflog, but the
+    first-parent walk between each branch and its upstream is only redone for
+    branches whose tips or upstreams changed, and uses first-parent jump
+    pointers kept for the lifetime of this object.
+    """
+
+    def __init__(self, *, window_size_secs: int = 60) -> None:
+        self.window_size_secs = window_size_secs
+        self.ranges = UpstreamRangeCache(
+            jumps=FirstParentJumps(window_size_secs=window_size_secs)
+        )
+        self._signatures: dict[Branch, BranchSignature] | None = None
+        self._horizon: int | None = None
+        self._truncated = False
+        self._joins: list[tuple[Branch, Branch]] = []
+
+    def compute(
+        self,
+        branches: list[Branch],
+        *,
+        horizon: HistoryHorizon | None = None,
+        executor: Executor | None = None,
+    ) -> DAG[Branch]:
+        signatures = {branch: branch_signature(branch) for branch in branches}
+        horizon_timestamp = horizon.timestamp if horizon else None
+        if signatures == self._signatures and horizon_timestamp == self._horizon:
+            if horizon is not None and self._truncated:
+                horizon.truncated = True
+            # Rebuild with this refresh's branch objects, in the original join order
+            current = {branch: branch for branch in branches}
+            return DAG(
+                branches,
+                ((current[a], current[b]) for a, b in self._joins),
+                bitsets=True,
+            )
+
+        self.ranges.retain(branches)
+        self._joins = list(
+            merge_histories(
+                branches,
+                window_size_secs=self.window_size_secs,
+                horizon=horizon,
+                executor=executor,
+                ranges=self.ranges,
+            )
+        )
+        self._signatures = signatures
+        self._horizon = horizon_timestamp
+        self._truncated = horizon is not None and horizon.truncated
+        return DAG(branches, self._joins, bitsets=True)
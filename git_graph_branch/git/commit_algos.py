@@ -1,24 +1,36 @@
-from collections.abc import MutableMapping, MutableSet
+from collections.abc import Collection, Mapping, MutableMapping, MutableSet
 from functools import total_ordering
-from heapq import heappop, heappush
+from heapq import heapify, heappop, heappush
+from itertools import count
 from typing import Any, Callable, Iterable, Iterator
 
+from ..bits import set_bits
 from .commit import Commit, MissingCommit
+from .pack import PackDir, ReachableObjects
+
+
+def chrono_key(commit: Commit) -> tuple[int, str]:
+    """Orders commits based on their commit_date
+
+    More recent commits are higher priority (i.e. smaller). Missing commits
+    sort after all others.
+    """
+    try:
+        return (-commit.commit_date, commit.hash)
+    except MissingCommit:
+        return (1, commit.hash)
 
 
 @total_ordering
 class ChronoCommit:
-    """Orders commits based on their commit_date
+    """Wraps a commit so it orders by chrono_key.
 
-    More recent commits are higher priority (i.e. smaller)
+    CommitHeap no longer uses this; it is kept for compatibility.
     """
 
     def __init__(self, commit: Commit):
         self.commit = commit
-        try:
-            self._key = (-commit.commit_date, commit.hash)
-        except MissingCommit:
-            self._key = (1, commit.hash)
+        self._key = chrono_key(commit)
 
     def __eq__(self, other: Any) -> bool:
         if not isinstance(other, ChronoCommit):
@@ -32,38 +44,89 @@ class ChronoCommit:
         return -self._key[0] > commit_date
 
 
+type HeapEntry = tuple[int, str, int, Commit]
+
+
 class CommitHeap[V]:
-    """Stores a heap of commits, with O(1) access to the newest commit."""
+    """Stores a heap of commits, with O(1) access to the newest commit.
+
+    Entries are plain tuples of (chrono_key, sequence number, commit), so
+    heap operations compare natively. The sequence number breaks ties
+    between duplicate entries before the commits themselves are compared.
+
+    Commits removed from the owning collection leave stale entries behind,
+    which are skipped lazily. Once stale entries outnumber live ones, the
+    heap is compacted, so its size stays proportional to live_count().
+    """
 
     def __init__(
-        self, still_contains: Callable[[Commit], bool], on_remove: Callable[[Commit], V]
+        self,
+        still_contains: Callable[[Commit], bool],
+        on_remove: Callable[[Commit], V],
+        live_count: Callable[[], int],
     ):
-        self._heap: list[ChronoCommit] = []
+        self._heap: list[HeapEntry] = []
+        self._sequence = count()
         self.still_contains = still_contains
         self.on_remove = on_remove
+        self.live_count = live_count
+        self.compactions = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    @property
+    def stale(self) -> int:
+        """The number of heap entries no longer in the owning collection."""
+        return len(self._heap) - self.live_count()
+
+    @property
+    def live_ratio(self) -> float:
+        """The fraction of heap entries still in the owning collection."""
+        return self.live_count() / len(self._heap) if self._heap else 1.0
 
     def add(self, commit: Commit) -> None:
-        heappush(self._heap, ChronoCommit(commit))
+        """Push commit, which must already be in the owning collection."""
+        date_key, hash = chrono_key(commit)
+        heappush(self._heap, (date_key, hash, next(self._sequence), commit))
+        self.tidy()
+
+    def tidy(self) -> None:
+        """Compact the heap if stale entries outnumber live ones."""
+        if len(self._heap) > 2 * self.live_count() + 32:
+            seen: set[Commit] = set()
+            heap: list[HeapEntry] = []
+            for entry in self._heap:
+                commit = entry[3]
+                if commit not in seen and self.still_contains(commit):
+                    seen.add(commit)
+                    heap.append(entry)
+            heapify(heap)
+            self._heap = heap
+            self.compactions += 1
 
     def remove_newer_than(self, commit_date: int) -> None:
-        while self._heap and self._heap[0].is_newer_than(commit_date):
-            commit = heappop(self._heap).commit
+        heap = self._heap
+        while heap and -heap[0][0] > commit_date:
+            commit = heappop(heap)[3]
             try:
                 self.on_remove(commit)
             except KeyError:
                 pass
 
     def peek(self) -> Commit | None:
-        while self._heap and (commit := self._heap[0].commit) is not None:
+        heap = self._heap
+        while heap:
+            commit = heap[0][3]
             if self.still_contains(commit):
                 return commit
-            heappop(self._heap)
+            heappop(heap)
         return None
 
     def pop(self) -> tuple[Commit, V]:
         while True:
             try:
-                commit = heappop(self._heap).commit
+                commit = heappop(self._heap)[3]
             except IndexError:
                 raise KeyError() from None
             try:
@@ -79,7 +142,9 @@ class CommitSet(MutableSet[Commit]):
     def __init__(self, *commits: Commit):
         self._commits = set(commits)
         self._heap = CommitHeap(
-            still_contains=lambda x: x in self._commits, on_remove=self._commits.remove
+            still_contains=lambda x: x in self._commits,
+            on_remove=self._commits.remove,
+            live_count=lambda: len(self._commits),
         )
         for commit in commits:
             self._heap.add(commit)
@@ -97,12 +162,18 @@ class CommitSet(MutableSet[Commit]):
     def add(self, commit: Commit | None) -> None:
         """Add a commit to the window."""
         self.last_added = commit
-        if commit:
+        if commit and commit not in self._commits:
             self._commits.add(commit)
             self._heap.add(commit)
 
     def discard(self, value: Commit) -> None:
         self._commits.discard(value)
+        self._heap.tidy()
+
+    @property
+    def live_ratio(self) -> float:
+        """The fraction of heap entries still in the set, for diagnostics."""
+        return self._heap.live_ratio
 
     def has_commit_newer_than(self, timestamp: int) -> bool:
         commit = self._heap.peek()
@@ -126,7 +197,9 @@ class CommitMap[T](MutableMapping[Commit, T]):
     def __init__(self) -> None:
         self._map: dict[Commit, T] = {}
         self._heap = CommitHeap(
-            still_contains=lambda x: x in self._map, on_remove=self._map.pop
+            still_contains=lambda x: x in self._map,
+            on_remove=self._map.pop,
+            live_count=lambda: len(self._map),
         )
         self._window_top: int | None = None
 
@@ -135,12 +208,19 @@ class CommitMap[T](MutableMapping[Commit, T]):
 
     def __setitem__(self, key: Commit, value: T, /) -> None:
         if self._window_top is None or key.commit_date >= self._window_top:
-            if key not in self._map:
-                self._heap.add(key)
+            is_new = key not in self._map
             self._map[key] = value
+            if is_new:
+                self._heap.add(key)
 
     def __delitem__(self, key: Commit, /) -> None:
         del self._map[key]
+        self._heap.tidy()
+
+    @property
+    def live_ratio(self) -> float:
+        """The fraction of heap entries still in the map, for diagnostics."""
+        return self._heap.live_ratio
 
     def __iter__(self) -> Iterator[Commit]:
         return iter(self._map)
@@ -216,10 +296,25 @@ class CommitSetMultimap[*Ts]:
 
 
 class WindowedReachable:
-    def __init__(self, commit: Commit, *, window_size_secs: int = 60) -> None:
+    """Answers whether commits are reachable from a fixed commit.
+
+    Queries must be made in reverse chronological order. If pack bitmaps
+    are given, the walk stops at any bitmapped commit, and its whole
+    ancestry is looked up in the bitmap instead.
+    """
+
+    def __init__(
+        self,
+        commit: Commit,
+        *,
+        window_size_secs: int = 60,
+        bitmaps: PackDir | None = None,
+    ) -> None:
         self._reachable = CommitSet(commit)
         self._todo = CommitSet(commit)
+        self._bitmapped = ReachableObjects()
         self.window_size_secs = window_size_secs
+        self.bitmaps = bitmaps
 
     def _slide_window_to(self, ts: int) -> None:
         window_top = ts + self.window_size_secs
@@ -228,6 +323,9 @@ class WindowedReachable:
             self._todo and self._todo.peek().commit_date >= ts - self.window_size_secs
         ):
             commit = self._todo.pop()
+            if self.bitmaps and (reached := self.bitmaps.reachable_from(commit.hash)):
+                self._bitmapped |= reached
+                continue
             for parent in commit.available_parents():
                 self._todo.add(parent)
                 if parent.commit_date <= window_top:
@@ -235,14 +333,19 @@ class WindowedReachable:
 
     def __contains__(self, commit: Commit) -> bool:
         self._slide_window_to(commit.commit_date)
-        return commit in self._reachable
+        return commit in self._reachable or commit.hash in self._bitmapped
 
 
 def unmerged_commits(
-    downstream: Commit, *upstreams: Commit, window_size_secs: int = 60
+    downstream: Commit,
+    *upstreams: Commit,
+    window_size_secs: int = 60,
+    bitmaps: PackDir | None = None,
 ) -> Iterator[Commit]:
     """Yield all commits on upstreams that are not reachable from downstream."""
-    reachable = WindowedReachable(downstream, window_size_secs=window_size_secs)
+    reachable = WindowedReachable(
+        downstream, window_size_secs=window_size_secs, bitmaps=bitmaps
+    )
     todo = CommitSet(*upstreams)
     seen = CommitSet(*upstreams)
     while todo:
@@ -261,10 +364,188 @@ def unmerged_commits(
                 seen.add(parent)
 
 
+def batch_unmerged_counts[K](
+    queries: Mapping[K, tuple[Commit, Collection[Commit]]],
+    *,
+    window_size_secs: int = 60,
+    bitmaps: PackDir | None = None,
+    limit: int | None = None,
+) -> dict[K, int]:
+    """Count unmerged_commits(downstream, *upstreams) for many queries at once.
+
+    Each query is assigned one bit. A single date-ordered traversal tracks,
+    per commit, the set of downstreams that reach it and the set of upstream
+    first-parent walks that have not yet been stopped, so history shared
+    between branches is only walked once. As in unmerged_commits, the walk
+    stops at any commit covered by the given pack bitmaps.
+
+    If limit is given, each query stops walking once it has counted more
+    than limit commits, so counts are capped at limit + 1.
+    """
+    keys = list(queries)
+    counts = [0] * len(keys)
+    # Commits reachable from each query's downstream
+    reach: dict[Commit, int] = {}
+    # Reachable commits whose parents have not yet been marked
+    pending: CommitMap[int] = CommitMap()
+    # Upstream first-parent walks, and the commits each has already visited
+    frontier: CommitMap[int] = CommitMap()
+    done: dict[Commit, int] = {}
+    # Ancestries looked up in pack bitmaps rather than walked, by query
+    bitmapped: dict[int, ReachableObjects] = {}
+    # Queries that have reached their limit
+    capped = 0
+
+    def add_reach(commit: Commit, mask: int) -> None:
+        new = mask & ~reach.get(commit, 0)
+        if new:
+            reach[commit] = reach.get(commit, 0) | new
+            pending[commit] = pending.get(commit, 0) | new
+
+    def add_frontier(commit: Commit, mask: int) -> None:
+        new = mask & ~done.get(commit, 0)
+        if new:
+            frontier[commit] = frontier.get(commit, 0) | new
+
+    for i, key in enumerate(keys):
+        downstream, upstreams = queries[key]
+        add_reach(downstream, 1 << i)
+        for upstream in upstreams:
+            add_frontier(upstream, 1 << i)
+
+    while frontier:
+        commit, mask = frontier.popitem()
+        mask &= ~(done.get(commit, 0) | capped)
+        if not mask:
+            continue
+        done[commit] = done.get(commit, 0) | mask
+        window_bottom = commit.commit_date - window_size_secs
+        while pending and pending.peek().commit_date >= window_bottom:
+            reached, reached_mask = pending.popitem()
+            if bitmaps and (objects := bitmaps.reachable_from(reached.hash)):
+                for i in set_bits(reached_mask):
+                    bitmapped[i] = bitmapped.get(i, ReachableObjects()) | objects
+                continue
+            for parent in reached.available_parents():
+                add_reach(parent, reached_mask)
+        mask &= ~reach.get(commit, 0)
+        for i in set_bits(mask & sum(1 << i for i in bitmapped)):
+            if commit.hash in bitmapped[i]:
+                mask &= ~(1 << i)
+        if not mask:
+            continue
+        for i in set_bits(mask):
+            counts[i] += 1
+            if limit is not None and counts[i] > limit:
+                capped |= 1 << i
+        mask &= ~capped
+        try:
+            first_parent = commit.first_parent
+        except MissingCommit:
+            pass
+        else:
+            if first_parent:
+                add_frontier(first_parent, mask)
+
+    return dict(zip(keys, counts))
+
+
+type Jump = tuple[Commit | None, int]
+
+
+class FirstParentJumps:
+    """Jump pointers over first-parent chains, for fast ancestry checks.
+
+    For each commit visited, the 2^k-th first-parent ancestor is stored along
+    with the oldest commit date passed over on the way, so long stretches of
+    history that are all newer than a target can be skipped in one step.
+    Pointers are computed lazily and keyed by hash; as commits are immutable,
+    an index can be kept for the lifetime of the process.
+    """
+
+    def __init__(self, *, window_size_secs: int = 60) -> None:
+        self.window_size_secs = window_size_secs
+        self._jumps: dict[str, list[Jump]] = {}
+
+    def _jump(self, commit: Commit, level: int) -> Jump:
+        jumps = self._jumps.setdefault(commit.hash, [])
+        while len(jumps) <= level:
+            if not jumps:
+                try:
+                    parent = commit.first_parent
+                except MissingCommit:
+                    parent = None
+                if parent is None:
+                    jumps.append((None, 0))
+                else:
+                    jumps.append((parent, parent.commit_date))
+            else:
+                middle, middle_date = jumps[-1]
+                if middle is None:
+                    jumps.append((None, 0))
+                else:
+                    end, end_date = self._jump(middle, len(jumps) - 1)
+                    jumps.append((end, min(middle_date, end_date)))
+        return jumps[level]
+
+    def __contains__(self, commit: Commit) -> bool:
+        """Whether pointers have been computed for commit."""
+        return commit.hash in self._jumps
+
+    def first_parent(self, commit: Commit) -> Commit | None:
+        """The first parent of commit, if available, recorded as a pointer."""
+        parent, _ = self._jump(commit, 0)
+        return parent
+
+    def is_first_parent_ancestor(self, ancestor: Commit, commit: Commit) -> bool:
+        """Whether ancestor is on the first-parent chain of commit."""
+        target_date = ancestor.commit_date
+        while commit != ancestor:
+            if commit.commit_date < target_date - self.window_size_secs:
+                return False
+            step, _ = self._jump(commit, 0)
+            level = 0
+            while True:
+                end, oldest_date = self._jump(commit, level)
+                # Only skip stretches that are all newer than the ancestor
+                if end is None or oldest_date <= target_date:
+                    break
+                step = end
+                level += 1
+            if step is None:
+                return False
+            commit = step
+        return True
+
+    def first_parents(self, commit: Commit, ancestor: Commit) -> Iterator[Commit]:
+        """Yields the first-parent chain of commit, stopping before ancestor."""
+        step: Commit | None = commit
+        while step is not None and step != ancestor:
+            yield step
+            step, _ = self._jump(step, 0)
+
+
 def range(
-    upstream: Commit, downstream: Commit, *, window_size_secs: int = 60
+    upstream: Commit,
+    downstream: Commit,
+    *,
+    window_size_secs: int = 60,
+    jumps: FirstParentJumps | None = None,
 ) -> Iterator[Commit]:
-    """Yields first parents of downstream not reachable from upstream."""
+    """Yields first parents of downstream not reachable from upstream.
+
+    If jump pointers are given, the first-parent chain of downstream is recorded
+    in them. If they already cover downstream, and upstream is a first-parent
+    ancestor of it, the range is read straight off the first-parent chain
+    without walking upstream's history.
+    """
+    if (
+        jumps is not None
+        and downstream in jumps
+        and jumps.is_first_parent_ancestor(upstream, downstream)
+    ):
+        yield from jumps.first_parents(downstream, upstream)
+        return
     seen = CommitSet(upstream)
     todo = CommitSet(upstream)
     commit: Commit | None = downstream
@@ -278,6 +559,9 @@ def range(
         if commit in seen:
             return
         yield commit
+        if jumps is not None:
+            commit = jumps.first_parent(commit)
+            continue
         try:
             commit = commit.first_parent
         except MissingCommit:
@@ -1,41 +1,139 @@
 import re
+from dataclasses import dataclass
 from functools import cache
 from os import environ
-from pathlib import Path
+from pathlib import Path, PurePath
 from typing import Iterator
 
-from .path import git_common_state
+from .path import git_common_state, git_working_state
 
-Config = dict[str | tuple[str, str], dict[str, str]]
+SectionKey = str | tuple[str, str]
+Config = dict[SectionKey, dict[str, str]]
 
+SINGLE_STRING_KEY = re.compile(r"^\[(\S+)\](\s*#.*)?$")
+DOUBLE_STRING_KEY = re.compile(r'^\[(\S+)\s+"([^\\"]*(\\.[^\\"]*)*)"\](\s*#.*)?$')
+KEY_VALUE = re.compile(r"^([-\w]+)\s*=\s*([^\"#\s]([^#]*[^#\s])?)(\s*#.*)?$")
+KEY_QUOTED_VALUE = re.compile(r'^(\w+)\s*=\s*"([^\\"]*(\\.[^\\"]*)*)"(\s*#.*)?$')
+BLANK = re.compile(r"^(#.*)?$")
 
-def parse_config(path: Path, result: Config) -> None:
-    SINGLE_STRING_KEY = re.compile(r"^\[(\S+)\](\s*#.*)?$")
-    DOUBLE_STRING_KEY = re.compile(r'^\[(\S+)\s+"([^\\"]*(\\.[^\\"]*)*)"\](\s*#.*)?$')
-    KEY_VALUE = re.compile(r"^([-\w]+)\s*=\s*([^\"#\s]([^#]*[^#\s])?)(\s*#.*)?$")
-    KEY_QUOTED_VALUE = re.compile(r'^(\w+)\s*=\s*"([^\\"]*(\\.[^\\"]*)*)"(\s*#.*)?$')
-    BLANK = re.compile(r"^(#.*)?$")
-    current_dict: dict[str, str] | None = None
+MAX_INCLUDE_DEPTH = 10
+"""Matches git's own limit, which guards against include cycles."""
+
+
+@dataclass(frozen=True)
+class ConfigFile:
+    """The sections of a single config file, in file order.
+
+    A section header may appear more than once; each occurrence is kept
+    separately so includes are applied at the point they appear.
+    """
+
+    sections: tuple[tuple[SectionKey, tuple[tuple[str, str], ...]], ...]
+
+
+def parse_config_file(path: Path) -> ConfigFile:
+    sections: list[tuple[SectionKey, list[tuple[str, str]]]] = []
     with path.open() as lines:
         for line in lines:
             line = line.strip()
             if m := SINGLE_STRING_KEY.match(line):
-                key = m.group(1)
-                current_dict = result.setdefault(key, {})
+                sections.append((m.group(1), []))
             elif m := DOUBLE_STRING_KEY.match(line):
                 key = (m.group(1), m.group(2).encode("utf-8").decode("unicode_escape"))
-                current_dict = result.setdefault(key, {})
+                sections.append((key, []))
             elif BLANK.match(line):
                 pass
-            elif current_dict is not None:
-                if m := (KEY_VALUE.match(line) or KEY_QUOTED_VALUE.match(line)):
-                    current_dict[m.group(1)] = (
-                        m.group(2).encode("utf-8").decode("unicode_escape")
-                    )
-                else:
-                    raise Exception(f"Error parsing {path}\nUnexpected line: {line}")
+            elif sections and (
+                m := (KEY_VALUE.match(line) or KEY_QUOTED_VALUE.match(line))
+            ):
+                value = m.group(2).encode("utf-8").decode("unicode_escape")
+                sections[-1][1].append((m.group(1), value))
             else:
                 raise Exception(f"Error parsing {path}\nUnexpected line: {line}")
+    return ConfigFile(tuple((key, tuple(entries)) for key, entries in sections))
+
+
+def parse_config(path: Path, result: Config) -> None:
+    """Parse a single config file into result, without following includes."""
+    for key, entries in parse_config_file(path).sections:
+        result.setdefault(key, {}).update(entries)
+
+
+FileIdentity = tuple[int, int, int, int]
+_parsed_files: dict[Path, tuple[FileIdentity, ConfigFile]] = {}
+
+
+def cached_config_file(path: Path) -> ConfigFile | None:
+    """Return the parsed contents of path, or None if it does not exist.
+
+    Files are only re-parsed if their identity (device, inode, size and
+    modification time) has changed since the last call.
+    """
+    try:
+        stat = path.stat()
+    except (FileNotFoundError, NotADirectoryError):
+        _parsed_files.pop(path, None)
+        return None
+    identity = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+    cached = _parsed_files.get(path)
+    if cached is not None and cached[0] == identity:
+        return cached[1]
+    parsed = parse_config_file(path)
+    _parsed_files[path] = (identity, parsed)
+    return parsed
+
+
+def gitdir_matches(pattern: str, config_path: Path, *, case_sensitive: bool) -> bool:
+    """Whether the current git directory matches an includeIf gitdir pattern."""
+    if pattern.startswith("~/"):
+        pattern = str(Path.home()) + pattern[1:]
+    elif pattern.startswith("./"):
+        pattern = str(config_path.parent) + pattern[1:]
+    elif not pattern.startswith("/"):
+        pattern = "**/" + pattern
+    if pattern.endswith("/"):
+        pattern += "**"
+    gitdir = git_working_state()
+    return any(
+        PurePath(candidate).full_match(pattern, case_sensitive=case_sensitive)
+        for candidate in {gitdir.absolute(), gitdir.resolve()}
+    )
+
+
+def include_applies(key: SectionKey, config_path: Path) -> bool:
+    if isinstance(key, str):
+        return key.lower() == "include"
+    section, condition = key
+    if section.lower() != "includeif":
+        return False
+    if condition.startswith("gitdir:"):
+        return gitdir_matches(condition[7:], config_path, case_sensitive=True)
+    if condition.startswith("gitdir/i:"):
+        return gitdir_matches(condition[9:], config_path, case_sensitive=False)
+    return False
+
+
+def include_path(value: str, config_path: Path) -> Path:
+    if value.startswith("~/"):
+        return Path.home() / value[2:]
+    return config_path.parent / value
+
+
+def load_config(path: Path, result: Config, *, depth: int = 0) -> None:
+    """Load a config file into result, following include and includeIf."""
+    parsed = cached_config_file(path)
+    if parsed is None:
+        return
+    for key, entries in parsed.sections:
+        section = result.setdefault(key, {})
+        for name, value in entries:
+            section[name] = value
+            if name.lower() == "path" and include_applies(key, path):
+                if depth >= MAX_INCLUDE_DEPTH:
+                    raise Exception(
+                        f"Error loading {path}\nExceeded maximum include depth"
+                    )
+                load_config(include_path(value, path), result, depth=depth + 1)
 
 
 def str_to_bool(value: str | None) -> bool | None:
@@ -84,11 +182,15 @@ def config_paths() -> Iterator[Path]:
 def config() -> Config:
     config: Config = {}
     for config_file in config_paths():
-        if config_file.exists():
-            parse_config(config_file, config)
+        load_config(config_file, config)
 
     return config
 
 
 def remote_push_default() -> str | None:
     return config().get("remote", {}).get("pushdefault")
+
+
+def history_horizon() -> str | None:
+    section = config().get("graph-branch", {})
+    return next((v for k, v in section.items() if k.lower() == "historyhorizon"), None)
@@ -1,8 +1,11 @@
+import struct
+from bisect import bisect_left
 from collections.abc import Mapping
 from enum import Enum
 from functools import cache
 from io import BufferedIOBase, BufferedReader
 from pathlib import Path
+from threading import Lock, local
 from types import TracebackType
 from typing import BinaryIO, Iterator, Type
 
@@ -16,17 +19,28 @@ def hash_bytes_to_str(hash: bytes) -> str:
     return hash.hex().rjust(40, "0")
 
 
+class FileHandle[F](local):
+    """A per-thread file handle, so pack files can be read from several threads."""
+
+    f: F | None = None
+    in_with_block = False
+
+
 class PackIndex(Mapping[str, int]):
     def __init__(self, path: Path):
         self._path = path
         self._cache: dict[str, int] = {}
-        self._f: BinaryIO | None = None
+        self._handle: FileHandle[BinaryIO] = FileHandle()
         self._bloom: Bloom | None = None
-        self._in_with_block = False
+        self._bloom_lock = Lock()
+
+    @property
+    def _f(self) -> BinaryIO | None:
+        return self._handle.f
 
     def __enter__(self) -> "PackIndex":
-        assert not self._in_with_block
-        self._in_with_block = True
+        assert not self._handle.in_with_block
+        self._handle.in_with_block = True
         return self
 
     def __exit__(
@@ -35,28 +49,33 @@ class PackIndex(Mapping[str, int]):
         exc_val: BaseException | None,
         exc_tb: TracebackType | None,
     ) -> None:
-        assert self._in_with_block
-        self._in_with_block = False
-        if self._f:
-            self._f.close()
-            self._f = None
+        assert self._handle.in_with_block
+        self._handle.in_with_block = False
+        if f := self._handle.f:
+            self._handle.f = None
+            f.close()
 
     def _open(self) -> BinaryIO:
-        assert self._in_with_block
-        if not self._f:
-            self._f = open(self._path, "rb")
+        assert self._handle.in_with_block
+        if not self._handle.f:
+            self._handle.f = open(self._path, "rb")
+        f = self._handle.f
         if self._bloom is None:
-            header = self._f.read(8)
-            if header != b"\xfftOc\x00\x00\x00\x02":
-                raise Exception("Unsupported pack index format (must be v2)")
-            self._f.seek(0x404)
-            size = int.from_bytes(self._f.read(4), byteorder="big", signed=False)
-            self._small_offsets_table = 0x408 + 24 * size
-            self._large_offsets_table = 0x408 + 28 * size
-            self._bloom = Bloom(size)
-            for _ in range(size):
-                self._bloom.add(self._f.read(20))
-        return self._f
+            with self._bloom_lock:
+                if self._bloom is None:
+                    f.seek(0)
+                    header = f.read(8)
+                    if header != b"\xfftOc\x00\x00\x00\x02":
+                        raise Exception("Unsupported pack index format (must be v2)")
+                    f.seek(0x404)
+                    size = int.from_bytes(f.read(4), byteorder="big", signed=False)
+                    self._small_offsets_table = 0x408 + 24 * size
+                    self._large_offsets_table = 0x408 + 28 * size
+                    bloom = Bloom(size)
+                    for _ in range(size):
+                        bloom.add(f.read(20))
+                    self._bloom = bloom
+        return f
 
     def __len__(self) -> int:
         # Read fanout[255] to determine number of hashes
@@ -97,28 +116,201 @@ class PackIndex(Mapping[str, int]):
 
         raise KeyError(hash_bytes_to_str(hash))
 
+    def _offset_at(self, idx: int) -> int:
+        f = self._open()
+        f.seek(self._small_offsets_table + idx * 4)
+        short_bytes = f.read(4)
+        short_size = int.from_bytes(short_bytes, byteorder="big", signed=False)
+        if short_size < 0x80000000:
+            return short_size
+        f.seek(self._large_offsets_table + 8 * (short_size - 0x80000000))
+        long_bytes = f.read(8)
+        return int.from_bytes(long_bytes, byteorder="big", signed=False)
+
+    def position(self, hash: str) -> int:
+        """The position of hash in the index, which is sorted by hash."""
+        hash_bytes = bytes.fromhex(hash)
+        if self._bloom and hash_bytes not in self._bloom:
+            raise KeyError(hash)
+        self._open()
+        return self._find_index(hash_bytes)
+
+    def hash_at(self, idx: int) -> str:
+        f = self._open()
+        f.seek(0x408 + 20 * idx)
+        return hash_bytes_to_str(f.read(20))
+
+    def offsets(self) -> list[int]:
+        """The pack offset of every object, in index order."""
+        length = len(self)
+        f = self._open()
+        f.seek(self._small_offsets_table)
+        offsets = list(struct.unpack(f">{length}I", f.read(4 * length)))
+        large_indices = [
+            (idx, offset - 0x80000000)
+            for idx, offset in enumerate(offsets)
+            if offset >= 0x80000000
+        ]
+        if large_indices:
+            large_count = max(large for _, large in large_indices) + 1
+            f.seek(self._large_offsets_table)
+            large_offsets = struct.unpack(f">{large_count}Q", f.read(8 * large_count))
+            for idx, large in large_indices:
+                offsets[idx] = large_offsets[large]
+        return offsets
+
     def __getitem__(self, hash: str) -> int:
         if not (isinstance(hash, str)):
             raise TypeError("Pack keys must be str")
         if hash not in self._cache:
-            hash_bytes = bytes.fromhex(hash)
-            if self._bloom and hash_bytes not in self._bloom:
-                raise KeyError(hash)
-            f = self._open()
-            idx = self._find_index(hash_bytes)
-            f.seek(self._small_offsets_table + idx * 4)
-            short_bytes = f.read(4)
-            short_size = int.from_bytes(short_bytes, byteorder="big", signed=False)
-            if short_size < 0x80000000:
-                size = short_size
-            else:
-                f.seek(self._large_offsets_table + 8 * (short_size - 0x80000000))
-                long_bytes = f.read(8)
-                size = int.from_bytes(long_bytes, byteorder="big", signed=False)
-            self._cache[hash] = size
+            self._cache[hash] = self._offset_at(self.position(hash))
         return self._cache[hash]
 
 
+def read_ewah(data: bytes, offset: int) -> tuple[int, int]:
+    """Decode an EWAH-compressed bitmap, as written by git.
+
+    Returns the bitmap as an int (bit i set if position i is in the set) and
+    the offset of the first byte after it.
+    """
+    word_count = int.from_bytes(data[offset + 4 : offset + 8], byteorder="big")
+    words_start = offset + 8
+    words_end = words_start + 8 * word_count
+    # Build the bitmap as little-endian bytes, then convert it once, as ORing
+    # each word into a growing int is quadratic in the size of the bitmap
+    buffer = bytearray()
+    i = words_start
+    while i < words_end:
+        rlw = int.from_bytes(data[i : i + 8], byteorder="big")
+        running_length = (rlw >> 1) & 0xFFFFFFFF
+        literal_count = rlw >> 33
+        buffer += (b"\xff" if rlw & 1 else b"\x00") * (8 * running_length)
+        i += 8
+        for _ in range(literal_count):
+            buffer += data[i : i + 8][::-1]
+            i += 8
+    # Skip the trailing position of the last run-length word
+    return int.from_bytes(buffer, byteorder="little"), words_end + 4
+
+
+class PackBitmap:
+    """Reachability bitmaps for selected commits in a pack.
+
+    Read from the .bitmap file git writes alongside a pack with
+    `git repack -b`. Bit i of a bitmap refers to the i-th object of the
+    pack in pack (offset) order.
+    """
+
+    HEADER = b"BITM\x00\x01"
+
+    def __init__(self, path: Path, index: PackIndex):
+        self._path = path
+        self._index = index
+        self._entries: dict[str, int] | None = None
+        self._raw_bitmaps: list[tuple[int, int]] = []
+        self._bitmaps: dict[int, int] = {}
+        self._data = b""
+        self._sorted_offsets: list[int] | None = None
+        self._positions: dict[str, int | None] = {}
+        self._lock = Lock()
+
+    def _load(self) -> dict[str, int]:
+        if self._entries is not None:
+            return self._entries
+        with self._lock:
+            if self._entries is not None:
+                return self._entries
+            with self._path.open("rb") as f:
+                data = f.read()
+            if data[:6] != self.HEADER:
+                raise Exception("Unsupported pack bitmap format (must be v1)")
+            entry_count = int.from_bytes(data[8:12], byteorder="big")
+            offset = 32
+            # Skip the type index bitmaps for commits, trees, blobs and tags
+            for _ in range(4):
+                _, offset = read_ewah(data, offset)
+            entries: dict[str, int] = {}
+            with self._index:
+                for i in range(entry_count):
+                    idx = int.from_bytes(data[offset : offset + 4], byteorder="big")
+                    xor_offset = data[offset + 4]
+                    entries[self._index.hash_at(idx)] = i
+                    self._raw_bitmaps.append((xor_offset, offset + 6))
+                    word_count = int.from_bytes(
+                        data[offset + 10 : offset + 14], byteorder="big"
+                    )
+                    offset += 6 + 12 + 8 * word_count
+            self._data = data
+            self._entries = entries
+        return self._entries
+
+    def _bitmap(self, entry: int) -> int:
+        if entry not in self._bitmaps:
+            xor_offset, offset = self._raw_bitmaps[entry]
+            bits, _ = read_ewah(self._data, offset)
+            if xor_offset:
+                bits ^= self._bitmap(entry - xor_offset)
+            self._bitmaps[entry] = bits
+        return self._bitmaps[entry]
+
+    def __contains__(self, hash: str) -> bool:
+        """Whether a reachability bitmap is stored for hash."""
+        return hash in self._load()
+
+    def __getitem__(self, hash: str) -> int:
+        """The pack positions of all objects reachable from hash."""
+        return self._bitmap(self._load()[hash])
+
+    def position(self, hash: str) -> int | None:
+        """The pack position of hash, or None if it is not in this pack."""
+        if hash not in self._positions:
+            with self._lock, self._index:
+                if self._sorted_offsets is None:
+                    self._sorted_offsets = sorted(self._index.offsets())
+                try:
+                    offset = self._index[hash]
+                except KeyError:
+                    self._positions[hash] = None
+                else:
+                    self._positions[hash] = bisect_left(self._sorted_offsets, offset)
+        return self._positions[hash]
+
+
+class ReachableObjects:
+    """Objects known to be reachable, according to pack bitmaps."""
+
+    def __init__(self, bits: Mapping[PackBitmap, int] | None = None):
+        self._bits = dict(bits or {})
+        # Little-endian bytes of each bitmap, for testing single bits without
+        # shifting a pack-sized int
+        self._buffers: dict[PackBitmap, bytes] = {}
+
+    def __bool__(self) -> bool:
+        return any(self._bits.values())
+
+    def __or__(self, other: "ReachableObjects") -> "ReachableObjects":
+        bits = dict(self._bits)
+        for bitmap, other_bits in other._bits.items():
+            bits[bitmap] = bits.get(bitmap, 0) | other_bits
+        return ReachableObjects(bits)
+
+    def __contains__(self, hash: object) -> bool:
+        if not isinstance(hash, str):
+            return False
+        for bitmap, bits in self._bits.items():
+            position = bitmap.position(hash)
+            if position is None:
+                continue
+            buffer = self._buffers.get(bitmap)
+            if buffer is None:
+                buffer = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+                self._buffers[bitmap] = buffer
+            byte = position >> 3
+            if byte < len(buffer) and buffer[byte] >> (position & 7) & 1:
+                return True
+        return False
+
+
 class ObjectKind(Enum):
     COMMIT = 1
     TREE = 2
@@ -170,14 +362,17 @@ class Delta:
 class PackData:
     def __init__(self, path: Path):
         self._path = path
-        self._f: BufferedReader | None = None
+        self._handle: FileHandle[BufferedReader] = FileHandle()
         self._inited = False
-        self._in_with_block = False
+
+    @property
+    def _f(self) -> BufferedReader | None:
+        return self._handle.f
 
     def __enter__(self) -> "PackData":
-        assert not self._in_with_block
-        assert not self._f
-        self._in_with_block = True
+        assert not self._handle.in_with_block
+        assert not self._handle.f
+        self._handle.in_with_block = True
         return self
 
     def __exit__(
@@ -186,23 +381,23 @@ class PackData:
         exc_val: BaseException | None,
         exc_tb: TracebackType | None,
     ) -> None:
-        assert self._in_with_block
-        self._in_with_block = False
-        if f := self._f:
-            self._f = None
+        assert self._handle.in_with_block
+        self._handle.in_with_block = False
+        if f := self._handle.f:
+            self._handle.f = None
             f.close()
 
     def _open(self) -> None:
-        assert self._in_with_block
-        if not self._f:
+        assert self._handle.in_with_block
+        if not self._handle.f:
             f = open(self._path, "rb")
             assert isinstance(f, BufferedReader)
-            self._f = f
-        if not self._inited:
-            header = self._f.read(8)
-            if header != b"PACK\x00\x00\x00\x02":
-                raise Exception("Unsupported pack format (must be v2)")
-            self._inited = True
+            self._handle.f = f
+            if not self._inited:
+                header = f.read(8)
+                if header != b"PACK\x00\x00\x00\x02":
+                    raise Exception("Unsupported pack format (must be v2)")
+                self._inited = True
 
     def read_object(self, offset: int) -> DataObject | Delta:
         if offset < 12:
@@ -272,6 +467,7 @@ class PackDir:
     def __init__(self, pack_dir: Path):
         assert pack_dir.is_dir()
         packs: list[tuple[float, str, Pack]] = []
+        bitmaps: list[PackBitmap] = []
         for data_file in pack_dir.glob("*.pack"):
             data = PackData(data_file)
             index_file = data_file.with_suffix(".idx")
@@ -280,9 +476,13 @@ class PackDir:
             index = PackIndex(index_file)
             mtime = data_file.stat().st_mtime
             packs.append((mtime, data_file.name, Pack(index, data)))
+            bitmap_file = data_file.with_suffix(".bitmap")
+            if bitmap_file.is_file():
+                bitmaps.append(PackBitmap(bitmap_file, index))
         # Sort packs by mtime, with filename as a tie breaker to avoid bugs
         packs.sort(reverse=True)
         self._packs = tuple(p[2] for p in packs)
+        self._bitmaps = tuple(bitmaps)
 
     def __getitem__(self, hash: str) -> tuple[ObjectKind, bytes]:
         if not (isinstance(hash, str)):
@@ -297,6 +497,13 @@ class PackDir:
     def __contains__(self, hash: str) -> bool:
         return any(hash in pack for pack in self._packs)
 
+    def reachable_from(self, hash: str) -> ReachableObjects | None:
+        """All objects reachable from hash, if a pack bitmap covers it."""
+        for bitmap in self._bitmaps:
+            if hash in bitmap:
+                return ReachableObjects({bitmap: bitmap[hash]})
+        return None
+
 
 @cache
 def packs() -> PackDir:
@@ -0,0 +1,76 @@
+"""Per-frame cache of reachability queries between commits.
+
+Branch colouring asks whether a branch is fully merged into its upstream,
+while the unmerged count asks the mirror-image question of the branch's
+parents. Both are answered by unmerged-commit walks over the same range,
+so queries are collected here and answered by one shared traversal.
+"""
+
+from collections.abc import Collection, Iterable
+
+from .bitmap import BranchBitmap
+from .commit import Commit
+from .commit_algos import batch_unmerged_counts
+from .pack import PackDir
+
+type Query = tuple[Commit, frozenset[Commit]]
+
+
+class ReachabilityCache:
+    """Caches unmerged commit counts for the lifetime of a single frame.
+
+    If a limit is given, counts are capped at limit + 1, and walks stop
+    once they reach it.
+    """
+
+    def __init__(
+        self,
+        *,
+        window_size_secs: int = 60,
+        bitmaps: PackDir | None = None,
+        limit: int | None = None,
+    ) -> None:
+        self._counts: dict[Query, int] = {}
+        self.window_size_secs = window_size_secs
+        self.bitmaps = bitmaps
+        self.limit = limit
+
+    def prefetch(self, queries: Iterable[tuple[Commit, Collection[Commit]]]) -> None:
+        """Answer all uncached queries with a single traversal."""
+        missing = {
+            query: (query[0], query[1])
+            for downstream, upstreams in queries
+            if (query := (downstream, frozenset(upstreams))) not in self._counts
+        }
+        if missing:
+            self._counts.update(
+                batch_unmerged_counts(
+                    missing,
+                    window_size_secs=self.window_size_secs,
+                    bitmaps=self.bitmaps,
+                    limit=self.limit,
+                )
+            )
+
+    def unmerged_count(self, downstream: Commit, *upstreams: Commit) -> int:
+        """The number of first-parent commits on upstreams not reachable from downstream."""
+        query = (downstream, frozenset(upstreams))
+        if query not in self._counts:
+            self.prefetch([query])
+        return self._counts[query]
+
+    def is_merged(self, commit: Commit, into: Commit) -> bool:
+        """Whether every first-parent commit of commit is reachable from into."""
+        return self.unmerged_count(into, commit) == 0
+
+    def prime(self, bitmap: BranchBitmap) -> None:
+        """Record the counts already known from a branch's reachability bitmap."""
+        self._counts[(bitmap.tip, frozenset([bitmap.base]))] = self._capped(
+            bitmap.behind_count
+        )
+        self._counts[(bitmap.base, frozenset([bitmap.tip]))] = self._capped(
+            bitmap.ahead_count
+        )
+
+    def _capped(self, count: int) -> int:
+        return count if self.limit is None else min(count, self.limit + 1)
@@ -1,9 +1,9 @@
+import mmap
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterator
 
 from .commit import Commit
-from .file_algos import readlines_reversed
 
 
 @dataclass(frozen=True)
@@ -12,17 +12,44 @@ class ReflogEntry:
     timestamp: int
 
 
-def reflog_from_line(line: str) -> ReflogEntry:
-    hash = line[41:81]
-    end_of_user_address = line.find(">", 81)
-    unix_time = line[end_of_user_address + 2 :].split(" ", 1)[0]
-
-    return ReflogEntry(Commit(hash), int(unix_time))
-
-
 def reflog_mtime(path: Path) -> int:
     return int(path.stat().st_mtime)
 
 
+def iter_reflog_raw(path: Path) -> Iterator[tuple[str, int]]:
+    """Yield (hash, timestamp) for each entry in a reflog, most recent first.
+
+    Works directly on the raw bytes of a memory-mapped file. Only the new hash
+    is decoded; the committer identity and message are skipped over unread.
+    """
+    with path.open("rb") as f:
+        size = f.seek(0, 2)
+        if size == 0:
+            return
+        # trackfd=False: the mapping survives closing the file, so no file
+        # handle is held while the caller iterates
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ, trackfd=False)
+    with data:
+        end = size
+        while end > 0:
+            start = data.rfind(b"\n", 0, end - 1) + 1
+            if data[end - 1] == 0x0A:
+                line_end = end - 1
+            else:
+                line_end = end
+            if line_end > start:
+                end_of_user_address = data.find(b">", start + 81, line_end)
+                time_start = end_of_user_address + 2
+                time_end = data.find(b" ", time_start, line_end)
+                if time_end < 0:
+                    time_end = line_end
+                hash = data[start + 41 : start + 81].decode("ascii")
+                yield (hash, int(data[time_start:time_end]))
+            end = start
+
+
 def iter_reflog(path: Path) -> Iterator[ReflogEntry]:
-    return (reflog_from_line(line) for line in readlines_reversed(path))
+    return (
+        ReflogEntry(Commit(hash), timestamp)
+        for hash, timestamp in iter_reflog_raw(path)
+    )
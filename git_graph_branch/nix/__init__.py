@@ -19,7 +19,8 @@ Usage:
     asyncio.run(amain(), loop_factory=nix.loop_factory)
 """
 
+from .console import flush_held_io
 from .loop import loop_factory, once, watcher
 from .patching import install
 
-__all__ = ["install", "loop_factory", "once", "watcher"]
+__all__ = ["flush_held_io", "install", "loop_factory", "once", "watcher"]
@@ -143,3 +143,13 @@ def flush_io_on_shutdown() -> Generator[None, None, None]:
     finally:
         _nixable_stdout.flush_to_underlying()
         _nixable_stderr.flush_to_underlying()
+
+
+def flush_held_io() -> None:
+    """Show any stdout output held back for the current frame immediately.
+
+    Later output continues to be held. Does nothing if nix is not installed.
+    """
+    if _nixable_stdout is not None and _nixable_stdout._buffer is not None:
+        _nixable_stdout.flush_to_underlying()
+        _nixable_stdout.hold_io()
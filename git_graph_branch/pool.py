@@ -0,0 +1,65 @@
+"""Helpers for running work on a thread pool.
+
+Tasks run in a copy of the submitting thread's context, so filesystem
+accesses made on worker threads are still tracked by nix.
+"""
+
+from concurrent.futures import Executor, Future
+from contextvars import copy_context
+from itertools import islice
+from typing import Callable, Iterable, Iterator
+
+PREFETCH_CHUNK_SIZE = 64
+
+
+def submit[**P, T](
+    executor: Executor, fn: Callable[P, T], /, *args: P.args, **kwargs: P.kwargs
+) -> Future[T]:
+    """Schedule fn(*args, **kwargs) to run in a copy of the current context."""
+    context = copy_context()
+
+    def run() -> T:
+        return context.run(fn, *args, **kwargs)
+
+    return executor.submit(run)
+
+
+def parallel_map[T, R](
+    fn: Callable[[T], R], items: Iterable[T], *, executor: Executor | None
+) -> list[R]:
+    """Return [fn(item) for item in items], run on executor if one is given."""
+    if executor is None:
+        return [fn(item) for item in items]
+    futures = [submit(executor, fn, item) for item in items]
+    return [future.result() for future in futures]
+
+
+def prefetched[T](
+    iterator: Iterator[T],
+    *,
+    executor: Executor,
+    chunk_size: int = PREFETCH_CHUNK_SIZE,
+) -> Iterator[T]:
+    """Yield from iterator, computing chunks of it on executor ahead of time.
+
+    The first chunk is submitted immediately, and each subsequent one as soon as
+    the previous one is handed over, so at most two chunks are held at once.
+    Workers never wait on the consumer, so any number of prefetched iterators
+    can share one executor without deadlocking.
+    """
+
+    def next_chunk() -> list[T]:
+        return list(islice(iterator, chunk_size))
+
+    future = submit(executor, next_chunk)
+
+    def drain(future: Future[list[T]]) -> Iterator[T]:
+        while True:
+            chunk = future.result()
+            if len(chunk) < chunk_size:
+                yield from chunk
+                return
+            future = submit(executor, next_chunk)
+            yield from chunk
+
+    return drain(future)
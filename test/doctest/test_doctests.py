@@ -3,6 +3,7 @@ from types import ModuleType
 
 import pytest
 
+import git_graph_branch.bits as bits
 import git_graph_branch.dag as dag
 
 
@@ -24,7 +25,7 @@ def run_doctest(test: doctest.DocTest) -> doctest.TestResults:
     return runner.summarize(verbose=False)
 
 
-@pytest.mark.parametrize("test", collect_doctests(dag))
+@pytest.mark.parametrize("test", collect_doctests(bits, dag))
 def test_docstrings(test: doctest.DocTest) -> None:
     result = run_doctest(test)
     if result.failed:
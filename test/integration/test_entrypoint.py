@@ -1,4 +1,5 @@
 # coding=utf-8
+import re
 from datetime import datetime, timedelta
 from subprocess import check_call
 from textwrap import dedent
@@ -80,6 +81,36 @@ async def test_simple_repository_graph_tty(capsys: pytest.CaptureFixture[str]) -
     assert err == ""
 
 
+@pytest.mark.usefixtures("repo")
+async def test_history_horizon(
+    capsys: pytest.CaptureFixture[str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("GIT_COMMITTER_DATE", "2022-11-23T12:01:00+00:00")
+    git_test_commit()
+    check_call(["git", "checkout", "main", "-b", "feature"])
+    git_test_commit()
+    check_call(["git", "checkout", "main", "-b", "release"])
+    check_call(["git", "merge", "--no-ff", "-qm", "Merge feature", "feature"])
+
+    await amain([])
+    full, _ = capsys.readouterr()
+    await amain(["--history-horizon", "90d"])
+    truncated, _ = capsys.readouterr()
+
+    assert full == dedent("""\
+        ┬◀┐  release
+        ├▶┘  feature
+        ┴  main
+    """)
+    *rows, note = truncated.splitlines(keepends=True)
+    assert "".join(rows) == dedent("""\
+        ┬  release
+        ├▶╴  feature
+        ┴  main
+    """)
+    assert re.fullmatch(r"\(history before \d{4}-\d\d-\d\d ignored\)\n", note)
+
+
 @pytest.mark.usefixtures("repo")
 async def test_worktree_branch_indicator(
     capsys: pytest.CaptureFixture[str], tmp_path: str
@@ -99,3 +130,74 @@ async def test_worktree_branch_indicator(
     assert err == ""
 
     check_call(["git", "worktree", "remove", f"{tmp_path}/wt"])
+
+
+@pytest.mark.usefixtures("repo")
+async def test_max_unmerged(capsys: pytest.CaptureFixture[str]) -> None:
+    git_test_commit()
+    check_call(["git", "checkout", "main", "-b", "stale"])
+    git_test_commit("stale.txt")
+    check_call(["git", "checkout", "main"])
+    for _ in range(3):
+        git_test_commit("main.txt")
+
+    await amain(["--max-unmerged", "2"])
+
+    out, err = capsys.readouterr()
+    assert out == dedent(
+        """\
+        ┬  stale [2+ unmerged]
+        ┴  main
+        """
+    )
+    assert err == ""
+
+
+@pytest.mark.usefixtures("repo")
+async def test_max_rows(capsys: pytest.CaptureFixture[str]) -> None:
+    repo_setup()
+    expected = """\
+        ┬◀┐  feature4 [1 unmerged]
+        ┼ │  feature3
+        │ ┼  feature2
+        (3 more branches not shown)
+    """
+
+    await amain(["--max-rows", "3"])
+
+    out, err = capsys.readouterr()
+    assert out == dedent(expected)
+    assert err == ""
+
+
+@pytest.mark.usefixtures("repo")
+async def test_progressive_streams_rows_in_order(
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    config_setup()
+    repo_setup()
+    await amain([])
+    expected, _ = capsys.readouterr()
+
+    await amain(["--progressive", "--max-rows", "4"])
+
+    out, err = capsys.readouterr()
+    assert out == "".join(expected.splitlines(keepends=True)[:4]) + (
+        "(2 more branches not shown)\n"
+    )
+    assert err == ""
+
+
+@pytest.mark.usefixtures("repo")
+async def test_jobs(capsys: pytest.CaptureFixture[str]) -> None:
+    config_setup()
+    repo_setup()
+    await amain(["--remote-icons"])
+    expected, _ = capsys.readouterr()
+
+    await amain(["--remote-icons", "--jobs", "1"])
+
+    out, err = capsys.readouterr()
+    assert out == expected
+    assert "🔶" in out
+    assert err == ""
@@ -1,3 +1,6 @@
+from hypothesis import given
+from hypothesis import strategies as st
+
 from git_graph_branch.dag import DAG
 
 
@@ -61,3 +64,37 @@ def test_eq() -> None:
     assert g1 == g1
     assert g1 == g2
     assert g1 != g3
+
+
+def test_bitsets_cycle_ignored() -> None:
+    g: DAG[str] = DAG(bitsets=True)
+    assert g.add(("b", "c"))
+    assert g.add(("a", "b"))
+    assert g.add(("c", "d"))
+    assert g.add(("b", "c"))
+
+    assert not g.add(("d", "a"))
+    assert not g.add(("a", "a"))
+    assert ("d", "a") not in g
+    assert g == DAG(edges=[("b", "c"), ("a", "b"), ("c", "d")])
+
+
+@given(st.lists(st.tuples(st.integers(0, 20), st.integers(0, 20))))
+def test_bitsets_match_sets(edges: list[tuple[int, int]]) -> None:
+    sets: DAG[int] = DAG()
+    bitsets: DAG[int] = DAG(bitsets=True)
+
+    for edge in edges:
+        assert bitsets.add(edge) == sets.add(edge)
+
+    assert bitsets == sets
+
+
+def test_components() -> None:
+    g = DAG(nodes=["e"], edges=[("a", "b"), ("c", "d"), ("d", "b")])
+
+    assert g.component("a") == g.component("b") == g.component("c")
+    assert g.component("c") == g.component("d")
+    assert g.component("e") == "e"
+    assert not g.add(("b", "a"))
+    assert g.component("e") != g.component("a")
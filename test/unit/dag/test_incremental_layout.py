@@ -0,0 +1,28 @@
+from unittest.mock import patch
+
+from git_graph_branch.dag import DAG, IncrementalLayout, layout
+
+
+def test_reuses_layout_when_unchanged() -> None:
+    keys = {"a": 1, "b": 2, "c": 3}
+    layouts = IncrementalLayout(keys.__getitem__)
+    first = layouts(DAG(edges=[("a", "b"), ("a", "c")]))
+
+    with patch("git_graph_branch.dag.layout") as mock_layout:
+        second = layouts(DAG(edges=[("a", "c"), ("a", "b")]))
+
+    mock_layout.assert_not_called()
+    assert (
+        second == first == layout(DAG(edges=[("a", "b"), ("a", "c")]), keys.__getitem__)
+    )
+
+
+def test_relayout_when_key_changes() -> None:
+    keys = {"a": 1, "b": 2, "c": 3}
+    layouts = IncrementalLayout(keys.__getitem__)
+    dag = DAG(edges=[("a", "b"), ("a", "c")])
+    layouts(dag)
+
+    keys["b"] = 4
+
+    assert layouts(dag) == layout(dag, keys.__getitem__)
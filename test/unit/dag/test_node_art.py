@@ -3,6 +3,8 @@ from __future__ import annotations
 
 from textwrap import dedent
 
+import pytest
+
 from git_graph_branch.dag import NodeArt
 
 
@@ -148,3 +150,24 @@ def test_row_unicode_remerge_head_into_branch() -> None:
       ┴
   """
     )
+
+
+def test_rows_interned() -> None:
+    row = NodeArt(1, up={0, 1}, down=[0])
+
+    assert NodeArt(1, up=(1, 0), down={0}) is row
+    assert str(row) is str(row)
+    assert NodeArt(1, up={0, 1}) is not row
+
+
+def test_least_recently_used_row_evicted(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(NodeArt, "MAX_INTERNED", 2)
+    monkeypatch.setattr(NodeArt, "_interned", {})
+    first = NodeArt(0)
+    second = NodeArt(1)
+
+    assert NodeArt(0) is first
+    NodeArt(2)
+
+    assert NodeArt(0) is first
+    assert NodeArt(1) is not second
@@ -0,0 +1,56 @@
+from hypothesis import given
+from hypothesis import strategies as st
+
+from git_graph_branch.dag import PriorityKey, priority_key
+
+# Each step extends the key built at an earlier step (or no key) with a value
+key_steps = st.lists(
+    st.tuples(st.integers(0, 30), st.integers(0, 20)), min_size=1, max_size=30
+)
+
+
+def build_keys(
+    steps: list[tuple[int, int]],
+) -> tuple[list[PriorityKey], list[list[int]]]:
+    root = PriorityKey()
+    tries: list[PriorityKey] = []
+    lists: list[list[int]] = []
+    for parent, value in steps:
+        parent %= len(tries) + 1
+        if parent == len(tries):
+            tries.append(root.extend(value))
+            lists.append(priority_key(value, iter([])))
+        else:
+            tries.append(tries[parent].extend(value))
+            lists.append(priority_key(value, iter([lists[parent]])))
+    return tries, lists
+
+
+@given(key_steps)
+def test_extend_matches_priority_key(steps: list[tuple[int, int]]) -> None:
+    tries, lists = build_keys(steps)
+
+    assert [key.values() for key in tries] == lists
+
+
+@given(key_steps)
+def test_ordering_matches_lists(steps: list[tuple[int, int]]) -> None:
+    tries, lists = build_keys(steps)
+    root = tries[0]
+    while root.parent is not None:
+        root = root.parent
+    root.rank_keys()
+
+    for a, a_list in zip(tries, lists):
+        for b, b_list in zip(tries, lists):
+            assert (a < b) == (a_list < b_list)
+            assert (a.rank < b.rank) == (a_list < b_list)
+
+
+def test_deep_chain_shares_prefixes() -> None:
+    key = PriorityKey()
+    for value in range(10_000, 0, -1):
+        key = key.extend(value)
+
+    assert key.depth == 10_000
+    assert key.extend(5_000).depth == 5_001
@@ -0,0 +1,70 @@
+from git_graph_branch.git.commit_algos import batch_unmerged_counts, unmerged_commits
+
+from .test_unmerged_commits import mock_commit
+
+
+def test_matches_individual_walks() -> None:
+    #        b1 -- b2  <-- feature
+    #       /
+    # m1 -- m2 -- m3 -- m4  <-- main
+    #                \
+    #                 c1  <-- fix
+    m1 = mock_commit(commit_date=100, hash="m1")
+    m2 = mock_commit(commit_date=200, hash="m2", parents=(m1,))
+    b1 = mock_commit(commit_date=250, hash="b1", parents=(m2,))
+    m3 = mock_commit(commit_date=300, hash="m3", parents=(m2,))
+    b2 = mock_commit(commit_date=350, hash="b2", parents=(b1,))
+    m4 = mock_commit(commit_date=400, hash="m4", parents=(m3,))
+    c1 = mock_commit(commit_date=450, hash="c1", parents=(m3,))
+    queries = {
+        "feature": (b2, [m4]),
+        "fix": (c1, [m4]),
+        "main": (m4, []),
+        "feature-on-fix": (b2, [c1, m4]),
+    }
+
+    counts = batch_unmerged_counts(queries)
+
+    assert counts == {
+        key: len(list(unmerged_commits(downstream, *upstreams)))
+        for key, (downstream, upstreams) in queries.items()
+    }
+    assert counts == {"feature": 2, "fix": 1, "main": 0, "feature-on-fix": 3}
+
+
+def test_shared_history_walked_once() -> None:
+    # m0 -- m1 -- m2 -- ... -- m19  <-- main
+    #         \
+    #          b0, b1, b2  <-- three branches forked from m1
+    main = [mock_commit(commit_date=100, hash="m0")]
+    for i in range(1, 20):
+        main.append(
+            mock_commit(commit_date=100 * (i + 1), hash=f"m{i}", parents=(main[-1],))
+        )
+    branches = [
+        mock_commit(commit_date=3000 + i, hash=f"b{i}", parents=(main[1],))
+        for i in range(3)
+    ]
+
+    counts = batch_unmerged_counts({b: (b, [main[-1]]) for b in branches})
+
+    assert counts == {b: 18 for b in branches}
+    for commit in main + branches:
+        assert commit.available_parents.call_count <= 1  # type: ignore[attr-defined]
+
+
+def test_limit_caps_walk() -> None:
+    main = [mock_commit(commit_date=100, hash="m0")]
+    for i in range(1, 20):
+        main.append(
+            mock_commit(commit_date=100 * (i + 1), hash=f"m{i}", parents=(main[-1],))
+        )
+    stale = mock_commit(commit_date=150, hash="stale", parents=(main[0],))
+    fresh = mock_commit(commit_date=3000, hash="fresh", parents=(main[-2],))
+
+    counts = batch_unmerged_counts(
+        {"stale": (stale, [main[-1]]), "fresh": (fresh, [main[-1]])}, limit=5
+    )
+
+    assert counts == {"stale": 6, "fresh": 1}
+    assert main[10].available_parents.call_count == 0  # type: ignore[attr-defined]
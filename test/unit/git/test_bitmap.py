@@ -0,0 +1,69 @@
+from unittest.mock import Mock
+
+from git_graph_branch.git.bitmap import BranchBitmapIndex, CommitIndex, compute_bitmap
+from git_graph_branch.git.branch import Branch
+from git_graph_branch.git.commit import Commit
+from git_graph_branch.git.commit_algos import unmerged_commits
+
+
+def mock_commit(
+    *, commit_date: int, hash: str, parents: tuple[Commit, ...] = ()
+) -> Commit:
+    commit = Mock(name=f"Commit({hash})", spec=Commit)
+    commit.commit_date = commit_date
+    commit.hash = hash
+    commit.parents = parents
+    commit.first_parent = parents[0] if parents else None
+    commit.available_parents.side_effect = lambda: iter(parents)
+    return commit
+
+
+def diverged() -> tuple[Commit, Commit, Commit]:
+    #       b1 -- b2  <-- feature
+    #      /
+    # m1 -- m2 -- m3  <-- main
+    m1 = mock_commit(commit_date=100, hash="m1")
+    b1 = mock_commit(commit_date=150, hash="b1", parents=(m1,))
+    m2 = mock_commit(commit_date=200, hash="m2", parents=(m1,))
+    b2 = mock_commit(commit_date=250, hash="b2", parents=(b1,))
+    m3 = mock_commit(commit_date=300, hash="m3", parents=(m2,))
+    return m1, b2, m3
+
+
+def test_counts_match_unmerged_commits() -> None:
+    m1, b2, m3 = diverged()
+    index = CommitIndex()
+
+    bitmap = compute_bitmap(b2, m3, index)
+
+    assert bitmap.ahead_count == len(list(unmerged_commits(m3, b2))) == 2
+    assert bitmap.behind_count == len(list(unmerged_commits(b2, m3))) == 2
+    assert m1 not in set(index.commits(bitmap.ahead | bitmap.behind))
+
+
+def test_tip_advance_updated_incrementally() -> None:
+    m1, b2, m3 = diverged()
+    b3 = mock_commit(commit_date=400, hash="b3", parents=(b2,))
+    b4 = mock_commit(commit_date=500, hash="b4", parents=(b3,))
+    branch = Mock(spec=Branch)
+    bitmaps = BranchBitmapIndex()
+    bitmaps.bitmap(branch, b2, m3)
+    calls = b2.available_parents.call_count  # type: ignore[attr-defined]
+
+    bitmap = bitmaps.bitmap(branch, b4, m3)
+
+    assert b2.available_parents.call_count == calls  # type: ignore[attr-defined]
+    assert (bitmap.ahead_count, bitmap.behind_count) == (4, 2)
+    assert bitmap == compute_bitmap(b4, m3, bitmaps.commits)
+
+
+def test_merge_from_upstream_recomputed() -> None:
+    m1, b2, m3 = diverged()
+    b3 = mock_commit(commit_date=400, hash="b3", parents=(b2, m3))
+    branch = Mock(spec=Branch)
+    bitmaps = BranchBitmapIndex()
+    bitmaps.bitmap(branch, b2, m3)
+
+    bitmap = bitmaps.bitmap(branch, b3, m3)
+
+    assert (bitmap.ahead_count, bitmap.behind_count) == (3, 0)
@@ -102,3 +102,16 @@ def test_remove_newer_than() -> None:
 
     assert len(m) == 2
     assert m.peek() == c2
+
+
+def test_heap_compacted_after_deletions() -> None:
+    m: CommitMap[int] = CommitMap()
+    for i in range(1000):
+        commit = mock_commit(i)
+        m[commit] = i
+        if i % 10:
+            del m[commit]
+
+    assert len(m) == 100
+    assert len(m._heap) <= 2 * len(m) + 32
+    assert sorted(m.popitem()[1] for _ in range(100)) == list(range(0, 1000, 10))
@@ -127,3 +127,35 @@ def test_remove() -> None:
 
     assert c2 not in w
     assert w.pop() == c1
+
+
+def test_ties_never_compare_commits() -> None:
+    """Heap entries with equal keys must not fall back to comparing commits."""
+    a = mock_commit(commit_date=100, hash="a")
+    b = mock_commit(commit_date=100, hash="a")
+    w = CommitSet(a, b)
+
+    assert {w.pop(), w.pop()} == {a, b}
+
+
+def test_heap_compacted_after_discards() -> None:
+    w = CommitSet()
+    for i in range(1000):
+        commit = mock_commit(commit_date=i)
+        w.add(commit)
+        if i % 10:
+            w.discard(commit)
+
+    assert len(w) == 100
+    assert len(w._heap) <= 2 * len(w) + 32
+    assert w.live_ratio >= 1 / 3
+
+
+def test_readding_present_commit_does_not_grow_heap() -> None:
+    a = mock_commit(commit_date=100)
+    w = CommitSet(a)
+    w.add(a)
+    w.add(a)
+
+    assert len(w._heap) == 1
+    assert w.live_ratio == 1.0
@@ -1,9 +1,14 @@
+from concurrent.futures import ThreadPoolExecutor
 from typing import Iterator, cast
 from unittest.mock import Mock
 
 from git_graph_branch.dag import DAG
 from git_graph_branch.git.branch import Branch
-from git_graph_branch.git.branch_algos import compute_branch_dag
+from git_graph_branch.git.branch_algos import (
+    HistoryHorizon,
+    IncrementalBranchDag,
+    compute_branch_dag,
+)
 from git_graph_branch.git.commit import Commit
 from git_graph_branch.git.reflog import ReflogEntry
 
@@ -205,3 +210,128 @@ def test_overlapping_reflogs() -> None:
     dag = compute_branch_dag([w, x, y, z])
 
     assert dag == DAG(edges=[(w, x), (w, y), (w, z), (x, z)])
+
+
+def test_merge_before_horizon_ignored() -> None:
+    # X         Z
+    # ↓         ↓
+    # a -- b -- e
+    #  \       /
+    #   c --- d  ← Y
+    #
+    #             | ← horizon
+    a = mock_commit("a", 100)
+    b = mock_commit("b", 300, a)
+    c = mock_commit("c", 310, a)
+    d = mock_commit("d", 320, c)
+    e = mock_commit("e", 350, b, d)
+    x = mock_branch("X", a)
+    y = mock_branch("Y", d, x)
+    z = mock_branch("Z", e, x)
+    horizon = HistoryHorizon(400)
+
+    dag = compute_branch_dag([x, y, z], horizon=horizon)
+
+    assert dag == DAG(edges=[(x, y), (x, z)])
+    assert horizon.truncated
+
+
+def test_recent_merge_of_old_commit_kept() -> None:
+    # X         Z
+    # ↓         ↓
+    # a -- b -- e
+    #  \       /
+    #   c --- d  ← Y
+    #
+    #         | ← horizon
+    a = mock_commit("a", 100)
+    b = mock_commit("b", 300, a)
+    c = mock_commit("c", 310, a)
+    d = mock_commit("d", 320, c)
+    e = mock_commit("e", 500, b, d)
+    x = mock_branch("X", a)
+    y = mock_branch("Y", d, x, reflog=[(d, 450)])
+    z = mock_branch("Z", e, x)
+    horizon = HistoryHorizon(400)
+
+    dag = compute_branch_dag([x, y, z], horizon=horizon)
+
+    assert dag == DAG(edges=[(x, y), (x, z), (y, z)])
+
+
+def test_horizon_not_reached() -> None:
+    a = mock_commit("a", 100)
+    b = mock_commit("b", 300, a)
+    c = mock_commit("c", 310, a)
+    d = mock_commit("d", 320, c)
+    e = mock_commit("e", 500, b, d)
+    x = mock_branch("X", a)
+    y = mock_branch("Y", d, x)
+    z = mock_branch("Z", e, x)
+    horizon = HistoryHorizon(100)
+
+    dag = compute_branch_dag([x, y, z], horizon=horizon)
+
+    assert dag == DAG(edges=[(x, y), (x, z), (y, z)])
+    assert not horizon.truncated
+
+
+def test_reflogs_loaded_on_executor() -> None:
+    # Same graph as test_overlapping_reflogs
+    a = mock_commit("a", 100)
+    b = mock_commit("b", 300, a)
+    c = mock_commit("c", 310, a)
+    d = mock_commit("d", 320, c)
+    e = mock_commit("e", 400, b, d)
+    f = mock_commit("f", 500, d)
+    d_prime = mock_commit("d'", 800, c)
+    w = mock_branch("W", a)
+    x = mock_branch("X", d_prime, w, reflog=[d_prime, d, c, a])
+    y = mock_branch("Y", f, w, reflog=[f, (d, 480)])
+    z = mock_branch("Z", e, w)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        dag = compute_branch_dag([w, x, y, z], executor=executor)
+
+    assert dag == DAG(edges=[(w, x), (w, y), (w, z), (x, z)])
+
+
+def test_incremental_dag_reused_when_unchanged() -> None:
+    # Same graph as test_simple_merge
+    a = mock_commit("a", 100)
+    b = mock_commit("b", 300, a)
+    c = mock_commit("c", 310, a)
+    d = mock_commit("d", 320, c)
+    e = mock_commit("e", 500, b, d)
+    x = mock_branch("X", a)
+    y = mock_branch("Y", d, x)
+    z = mock_branch("Z", e, x)
+    dags = IncrementalBranchDag()
+    dags.compute([x, y, z])
+    walks = dags.ranges.walks
+
+    dag = dags.compute([x, y, z])
+
+    assert dag == DAG(edges=[(x, y), (x, z), (y, z)])
+    assert dags.ranges.walks == walks
+
+
+def test_incremental_dag_only_rewalks_changed_branch() -> None:
+    a = mock_commit("a", 100)
+    b = mock_commit("b", 300, a)
+    c = mock_commit("c", 310, a)
+    d = mock_commit("d", 320, c)
+    e = mock_commit("e", 500, b, d)
+    f = mock_commit("f", 510, e)
+    x = mock_branch("X", a)
+    y = mock_branch("Y", d, x)
+    z = mock_branch("Z", e, x)
+    dags = IncrementalBranchDag()
+    dags.compute([x, y, z])
+    walks = dags.ranges.walks
+
+    z.commit = f
+    dag = dags.compute([x, y, z])
+
+    assert dag == compute_branch_dag([x, y, z])
+    assert dags.ranges.walks == walks + 1
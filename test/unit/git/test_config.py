@@ -1,7 +1,10 @@
 from pathlib import Path
 from textwrap import dedent
 
-from git_graph_branch.git.config import config
+import pytest
+
+import git_graph_branch.git.config as config_module
+from git_graph_branch.git.config import ConfigFile, config, parse_config_file
 
 
 def test_combine_config_files(home_dir: Path, repo: Path, worktree: Path) -> None:
@@ -37,3 +40,49 @@ def test_combine_config_files(home_dir: Path, repo: Path, worktree: Path) -> Non
             "url": "https://example.org/joebloggs/some-repo.git",
         },
     }
+
+
+def test_include_relative_to_config_file(home_dir: Path, repo: Path) -> None:
+    (home_dir / ".gitconfig").write_text("[include]\n  path = extra.gitconfig\n")
+    (home_dir / "extra.gitconfig").write_text("[remote]\n  pushdefault = origin\n")
+
+    assert config()["remote"] == {"pushdefault": "origin"}
+
+
+def test_include_if_gitdir(
+    home_dir: Path, repo: Path, worktree: Path, tmp_path: Path
+) -> None:
+    global_config = f"""\
+        [includeIf "gitdir:{repo}/"]
+          path = ~/matching.gitconfig
+        [includeIf "gitdir:{tmp_path}/elsewhere/"]
+          path = ~/elsewhere.gitconfig
+    """
+    (home_dir / ".gitconfig").write_text(dedent(global_config))
+    (home_dir / "matching.gitconfig").write_text("[graph-branch]\n  color = mine\n")
+    (home_dir / "elsewhere.gitconfig").write_text("[graph-branch]\n  color = theirs\n")
+
+    assert config()["graph-branch"] == {"color": "mine"}
+
+
+def test_only_changed_files_reparsed(
+    home_dir: Path, repo: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    (home_dir / ".gitconfig").write_text("[user]\n  name = Joe Bloggs\n")
+    (repo / ".git" / "config").write_text("[remote]\n  pushdefault = origin\n")
+    parsed: list[Path] = []
+
+    def recording_parse(path: Path) -> ConfigFile:
+        parsed.append(path)
+        return parse_config_file(path)
+
+    monkeypatch.setattr(config_module, "parse_config_file", recording_parse)
+    config()
+    parsed.clear()
+
+    (repo / ".git" / "config").write_text("[remote]\n  pushdefault = upstream\n")
+    config.cache_clear()
+
+    assert config()["remote"] == {"pushdefault": "upstream"}
+    assert config()["user"] == {"name": "Joe Bloggs"}
+    assert parsed == [repo / ".git" / "config"]
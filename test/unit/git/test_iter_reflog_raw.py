@@ -0,0 +1,63 @@
+from pathlib import Path
+
+import pytest
+
+from git_graph_branch.git.reflog import iter_reflog_raw
+
+LINES = [
+    "0000000000000000000000000000000000000000 "
+    "4772051169d64bd03e73880caba2d948326b6123 "
+    "Unit Test Runner <unit-test-runner@example.com> "
+    "1755954500 +0100\tbranch: Created from HEAD\n",
+    "4772051169d64bd03e73880caba2d948326b6123 "
+    "d91365a2b659f8dbc6e8f5629999932a7128e730 "
+    "Ünït Tèst Rünnér <unit-test-runner@example.com> "
+    "1755954543 -0700\tcommit: Commit 13 ✨\n",
+    "d91365a2b659f8dbc6e8f5629999932a7128e730 "
+    "5e5b7e8e2b9ab3bd9b64eac6cbbd4a0c1b3d8d0a "
+    "Unit Test Runner <unit-test-runner@example.com> "
+    "1755954600 +0000\treset: moving to HEAD^\n",
+]
+
+
+@pytest.mark.parametrize(
+    "lines",
+    [
+        pytest.param(LINES, id="trailing-newline"),
+        pytest.param([*LINES[:-1], LINES[-1].rstrip("\n")], id="no-trailing-newline"),
+        pytest.param(LINES[:1], id="single-entry"),
+    ],
+)
+def test_most_recent_first(tmp_path: Path, lines: list[str]) -> None:
+    path = tmp_path / "reflog"
+    path.write_text("".join(lines), encoding="utf-8")
+
+    result = list(iter_reflog_raw(path))
+
+    expected = [
+        ("5e5b7e8e2b9ab3bd9b64eac6cbbd4a0c1b3d8d0a", 1755954600),
+        ("d91365a2b659f8dbc6e8f5629999932a7128e730", 1755954543),
+        ("4772051169d64bd03e73880caba2d948326b6123", 1755954500),
+    ]
+    assert result == expected[3 - len(lines) :]
+
+
+def test_empty_file(tmp_path: Path) -> None:
+    path = tmp_path / "reflog"
+    path.write_bytes(b"")
+
+    assert list(iter_reflog_raw(path)) == []
+
+
+def test_invalid_utf8_in_message_is_not_decoded(tmp_path: Path) -> None:
+    path = tmp_path / "reflog"
+    path.write_bytes(LINES[0].encode("utf-8").replace(b"Created", b"\xff\xfe"))
+
+    assert list(iter_reflog_raw(path)) == [
+        ("4772051169d64bd03e73880caba2d948326b6123", 1755954500)
+    ]
+
+
+def test_missing_file(tmp_path: Path) -> None:
+    with pytest.raises(FileNotFoundError):
+        list(iter_reflog_raw(tmp_path / "reflog"))
@@ -0,0 +1,102 @@
+from collections.abc import Iterator
+from pathlib import Path
+from subprocess import check_call, check_output
+
+import pytest
+
+from git_graph_branch.git.commit import Commit
+from git_graph_branch.git.commit_algos import unmerged_commits
+from git_graph_branch.git.pack import packs, read_ewah
+
+from .utils import git_test_commit, git_test_merge
+
+
+def rev_list_objects(rev: str) -> set[str]:
+    lines = check_output(["git", "rev-list", "--objects", rev], encoding="ascii")
+    return {line.split()[0] for line in lines.splitlines()}
+
+
+def test_reachable_from_matches_rev_list(worktree: Path) -> None:
+    git_test_commit("a")
+    c2 = git_test_commit("b")
+    check_call(["git", "checkout", "-qb", "side"])
+    side = git_test_commit("c")
+    check_call(["git", "checkout", "-q", "main"])
+    git_test_commit("d")
+    merge = git_test_merge("side")
+    check_call(["git", "repack", "-adbq"])
+
+    for rev in [merge, side, c2]:
+        reachable = packs().reachable_from(rev)
+        assert reachable is not None
+        expected = rev_list_objects(rev)
+        assert all(obj in reachable for obj in expected)
+        assert not any(obj in reachable for obj in rev_list_objects(merge) - expected)
+
+
+def test_positions_in_pack_order(worktree: Path) -> None:
+    git_test_commit("a")
+    check_call(["git", "checkout", "-qb", "side"])
+    git_test_commit("b")
+    check_call(["git", "checkout", "-q", "main"])
+    git_test_commit("c")
+    git_test_merge("side")
+    check_call(["git", "repack", "-adbq"])
+    common_dir = check_output(["git", "rev-parse", "--git-common-dir"], text=True)
+    (pack_file,) = (Path(common_dir.strip()) / "objects" / "pack").glob("*.pack")
+
+    verify = check_output(
+        ["git", "verify-pack", "-v", str(pack_file.with_suffix(".idx"))],
+        encoding="ascii",
+    )
+    objects = [line.split() for line in verify.splitlines()]
+    by_offset = sorted((int(obj[4]), obj[0]) for obj in objects if len(obj[0]) == 40)
+    (bitmap,) = packs()._bitmaps
+    assert [bitmap.position(hash) for _, hash in by_offset] == list(
+        range(len(by_offset))
+    )
+
+
+def test_unmerged_commits_stop_at_bitmapped_commit(
+    worktree: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    c1 = git_test_commit()
+    git_test_commit()
+    c3 = git_test_commit()
+    check_call(["git", "repack", "-adbq"])
+    check_call(["git", "checkout", "-qb", "feature"])
+    git_test_commit()
+    f2 = git_test_commit()
+    walked: list[str] = []
+    available_parents = Commit.available_parents
+
+    def recording_available_parents(self: Commit) -> Iterator[Commit]:
+        walked.append(self.hash)
+        return available_parents(self)
+
+    monkeypatch.setattr(Commit, "available_parents", recording_available_parents)
+
+    assert list(unmerged_commits(Commit(f2), Commit(c1), bitmaps=packs())) == []
+    assert c3 not in walked
+    walked.clear()
+    assert list(unmerged_commits(Commit(f2), Commit(c1))) == []
+    assert c3 in walked
+
+
+def test_read_ewah_runs_and_literals() -> None:
+    rlw = 1 | (2 << 1) | (1 << 33)  # Two words of ones, then one literal
+    data = b"".join(
+        [
+            (192).to_bytes(4, "big"),
+            (2).to_bytes(4, "big"),
+            rlw.to_bytes(8, "big"),
+            (0b101).to_bytes(8, "big"),
+            (0).to_bytes(4, "big"),
+            b"trailing",
+        ]
+    )
+
+    bits, end = read_ewah(data, 0)
+
+    assert bits == ((1 << 128) - 1) | (0b101 << 128)
+    assert data[end:] == b"trailing"
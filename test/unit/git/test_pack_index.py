@@ -63,6 +63,13 @@ def test_iteration() -> None:
     assert "0fb0b0931ef42707965bfe4e1f66c9ae29ca60ca" in hashes
 
 
+def test_offsets() -> None:
+    with PackIndex(DATA_DIR / "large.idx") as index:
+        offsets = index.offsets()
+        assert offsets == [index[hash] for hash in index]
+    assert 0x1_F026_D8EE in offsets
+
+
 def test_misses_do_not_reopen_file(tmp_path: Path) -> None:
     # Copy the test index to a temporary location
     index_copy = tmp_path / "example.index"
@@ -1,6 +1,7 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from subprocess import check_call
+from subprocess import check_call, check_output
 from time import sleep
 
 from git_graph_branch.git.pack import packs
@@ -52,3 +53,20 @@ def test_packs_with_identical_mtimes(repo: Path, worktree: Path) -> None:
     mtime0, mtime1, mtime2 = (p._data._path.lstat().st_mtime for p in ps._packs)
 
     assert mtime0 == mtime1 == mtime2
+
+
+def test_packs_read_from_many_threads(worktree: Path) -> None:
+    for i in range(20):
+        git_test_commit(f"file{i % 3}")
+    check_call(["git", "repack", "-adq"])
+    hashes = check_output(
+        ["git", "rev-list", "--objects", "--all"], encoding="ascii"
+    ).split()
+    hashes = [h for h in hashes if len(h) == 40]
+    ps = packs()
+    expected = [ps[h] for h in hashes]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(ps.__getitem__, hashes * 10))
+
+    assert results == expected * 10
@@ -1,8 +1,9 @@
+import builtins
 from typing import Iterator, cast
 from unittest.mock import Mock
 
 from git_graph_branch.git.commit import Commit, MissingCommit
-from git_graph_branch.git.commit_algos import range
+from git_graph_branch.git.commit_algos import FirstParentJumps, range
 
 
 class FakeMissingCommit:
@@ -106,3 +107,75 @@ def test_shallow_clone() -> None:
     # Should return c, b and stop when d raises MissingCommit
     result = list(range(upstream=a, downstream=c))
     assert result == [c, b]
+
+
+def linear_history(length: int) -> list[Commit]:
+    commits = [mock_commit(commit_date=100, hash="c0")]
+    for i in builtins.range(1, length):
+        commits.append(
+            mock_commit(commit_date=100 + 10 * i, hash=f"c{i}", parents=(commits[-1],))
+        )
+    return commits
+
+
+def test_first_parent_ancestor() -> None:
+    commits = linear_history(100)
+    jumps = FirstParentJumps()
+
+    assert jumps.is_first_parent_ancestor(commits[3], commits[97])
+    assert jumps.is_first_parent_ancestor(commits[50], commits[50])
+    assert not jumps.is_first_parent_ancestor(commits[97], commits[3])
+
+
+def test_first_parent_ancestor_on_other_branch() -> None:
+    # a -- b -- c   <-- upstream
+    #       \
+    #        d -- e   <-- downstream
+    a = mock_commit(commit_date=100, hash="a")
+    b = mock_commit(commit_date=200, hash="b", parents=(a,))
+    c = mock_commit(commit_date=300, hash="c", parents=(b,))
+    d = mock_commit(commit_date=250, hash="d", parents=(b,))
+    e = mock_commit(commit_date=350, hash="e", parents=(d,))
+    jumps = FirstParentJumps()
+
+    assert jumps.is_first_parent_ancestor(b, e)
+    assert not jumps.is_first_parent_ancestor(c, e)
+    assert list(range(upstream=c, downstream=e, jumps=jumps)) == [e, d]
+
+
+def test_jumps_skip_upstream_history() -> None:
+    commits = linear_history(100)
+    upstream = commits[10]
+    jumps = FirstParentJumps()
+    expected = list(range(upstream=upstream, downstream=commits[-1]))
+    cast(Mock, upstream).available_parents.reset_mock()
+
+    # The first walk records pointers, which later walks use
+    assert list(range(upstream=upstream, downstream=commits[-1], jumps=jumps)) == (
+        expected
+    )
+    assert commits[-1] in jumps
+    cast(Mock, upstream).available_parents.reset_mock()
+    result = list(range(upstream=upstream, downstream=commits[-1], jumps=jumps))
+
+    cast(Mock, upstream).available_parents.assert_not_called()
+    assert result == commits[:10:-1]
+    assert result == expected
+
+
+def test_jumps_not_checked_without_pointers() -> None:
+    commits = linear_history(100)
+    jumps = FirstParentJumps()
+    checks = []
+    is_first_parent_ancestor = jumps.is_first_parent_ancestor
+
+    def recording_check(ancestor: Commit, commit: Commit) -> bool:
+        checks.append(commit)
+        return is_first_parent_ancestor(ancestor, commit)
+
+    jumps.is_first_parent_ancestor = recording_check  # type: ignore[method-assign]
+
+    list(range(upstream=commits[10], downstream=commits[-1], jumps=jumps))
+    assert checks == []
+    list(range(upstream=commits[10], downstream=commits[-1], jumps=jumps))
+    assert checks == [commits[-1]]
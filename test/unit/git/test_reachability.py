@@ -0,0 +1,33 @@
+from git_graph_branch.git.reachability import ReachabilityCache
+
+from .test_unmerged_commits import mock_commit
+
+
+def test_unmerged_counts() -> None:
+    #       b1 -- b2  <-- feature
+    #      /
+    # m1 -- m2 -- m3  <-- main
+    m1 = mock_commit(commit_date=100, hash="m1")
+    b1 = mock_commit(commit_date=150, hash="b1", parents=(m1,))
+    m2 = mock_commit(commit_date=200, hash="m2", parents=(m1,))
+    b2 = mock_commit(commit_date=250, hash="b2", parents=(b1,))
+    m3 = mock_commit(commit_date=300, hash="m3", parents=(m2,))
+    reachability = ReachabilityCache()
+
+    assert reachability.unmerged_count(m3, b2) == 2
+    assert reachability.unmerged_count(b2, m3) == 2
+    assert not reachability.is_merged(b2, m3)
+    assert reachability.is_merged(m1, m3)
+
+
+def test_mirror_queries_share_one_traversal() -> None:
+    m1 = mock_commit(commit_date=100, hash="m1")
+    b1 = mock_commit(commit_date=150, hash="b1", parents=(m1,))
+    m2 = mock_commit(commit_date=200, hash="m2", parents=(m1,))
+    reachability = ReachabilityCache()
+    reachability.prefetch([(b1, [m2]), (m2, [b1])])
+    calls = [c.available_parents.call_count for c in (m1, b1, m2)]  # type: ignore[attr-defined]
+
+    assert reachability.unmerged_count(b1, m2) == 1
+    assert not reachability.is_merged(b1, m2)
+    assert calls == [c.available_parents.call_count for c in (m1, b1, m2)]  # type: ignore[attr-defined]
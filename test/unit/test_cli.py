@@ -0,0 +1,75 @@
+from io import StringIO
+from os import terminal_size
+from unittest.mock import patch
+
+from git_graph_branch.cli import progressive_screen, viewport
+from git_graph_branch.dag import NodeArt
+from git_graph_branch.display import Config, Screen
+from git_graph_branch.git import Branch, HistoryHorizon
+
+
+def truncated_horizon() -> HistoryHorizon:
+    horizon = HistoryHorizon(0)
+    horizon.truncated = True
+    return horizon
+
+
+@patch("shutil.get_terminal_size", new=lambda: terminal_size((80, 10)))
+def test_watch_frame_with_notes_repainted_in_place() -> None:
+    rows = [f"row {i}" for i in range(20)]
+    config = Config(watch=True)
+    out = StringIO()
+    screen = Screen(out)
+
+    visible, notes = viewport(config, rows, truncated_horizon())
+    screen.render(visible + notes)
+    out.truncate(0)
+    out.seek(0)
+    screen.render(visible + notes)
+
+    assert len(notes) == 2
+    assert len(visible) + len(notes) == 9
+    assert out.getvalue() == "\x1b[10;1H"
+
+
+@patch("shutil.get_terminal_size", new=lambda: terminal_size((80, 10)))
+def test_watch_frame_shown_whole_if_it_fits() -> None:
+    rows = [f"row {i}" for i in range(8)]
+
+    visible, notes = viewport(Config(watch=True), rows, truncated_horizon())
+
+    assert visible == rows
+    assert len(notes) == 1
+
+
+def test_max_rows() -> None:
+    rows = [f"row {i}" for i in range(8)]
+
+    visible, notes = viewport(Config(max_rows=3), rows, None)
+
+    assert visible == rows[:3]
+    assert notes == ["(5 more branches not shown)"]
+
+
+def progressive_rows() -> list[tuple[NodeArt, Branch]]:
+    return [
+        (NodeArt(0, down={0}), Branch("feature")),
+        (NodeArt(0, up={0}), Branch("main")),
+    ]
+
+
+@patch("shutil.get_terminal_size", new=lambda: terminal_size((80, 10)))
+def test_progressive_frame_drawn_inline() -> None:
+    config = Config(is_tty=True, progressive=True, max_unmerged=1000)
+
+    screen = progressive_screen(config, Screen(), progressive_rows(), set(), [])
+
+    assert screen is not None
+
+
+@patch("shutil.get_terminal_size", new=lambda: terminal_size((30, 10)))
+def test_progressive_frame_streamed_on_narrow_terminal() -> None:
+    # The skeletons fit, but rows with icons and unmerged counts may not
+    config = Config(is_tty=True, progressive=True, max_unmerged=1000)
+
+    assert progressive_screen(config, Screen(), progressive_rows(), set(), []) is None
@@ -0,0 +1,55 @@
+from subprocess import check_call
+from unittest.mock import patch
+
+import pytest
+
+from git_graph_branch.dag import layout
+from git_graph_branch.display import Config, RowCache
+from git_graph_branch.git import Branch, branches, compute_branch_dag
+from git_graph_branch.git.bitmap import BranchBitmap, BranchBitmapIndex
+
+from .git.utils import git_test_commit
+
+
+def render(rows: RowCache, bitmaps: BranchBitmapIndex) -> list[str]:
+    dag = compute_branch_dag(list(branches()))
+    art_and_branches = layout(dag, key=lambda b: (b.timestamp, b.name))
+    return rows.format_rows(art_and_branches, dag, Config(), set(), bitmaps)
+
+
+@pytest.mark.usefixtures("repo")
+def test_bitmaps_kept_for_unchanged_rows() -> None:
+    git_test_commit()
+    for name in ["feature", "other"]:
+        check_call(["git", "checkout", "-q", "main", "-b", name])
+        git_test_commit(f"{name}.txt")
+    check_call(["git", "checkout", "-q", "main"])
+    git_test_commit("main.txt")
+    rows = RowCache()
+    bitmaps = BranchBitmapIndex()
+    render(rows, bitmaps)
+
+    # Only other changes, so feature's row is reused
+    check_call(["git", "checkout", "-q", "other"])
+    git_test_commit("other.txt")
+    render(rows, bitmaps)
+
+    check_call(["git", "checkout", "-q", "feature"])
+    git_test_commit("feature.txt")
+    advanced: list[BranchBitmap | None] = []
+    original = BranchBitmapIndex._advance
+
+    def advance(
+        self: BranchBitmapIndex, old: BranchBitmap, *args: object
+    ) -> BranchBitmap | None:
+        result = original(self, old, *args)  # type: ignore[arg-type]
+        advanced.append(result)
+        return result
+
+    with patch.object(BranchBitmapIndex, "_advance", advance):
+        render(rows, bitmaps)
+
+    assert len(advanced) == 1
+    assert advanced[0] is not None
+    assert advanced[0].ahead_count == 2
+    assert Branch("feature") in bitmaps._bitmaps
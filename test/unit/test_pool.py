@@ -0,0 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import current_thread
+from typing import Iterator
+
+from git_graph_branch.pool import prefetched
+
+
+def test_prefetched_preserves_order() -> None:
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        items = list(prefetched(iter(range(200)), executor=executor, chunk_size=7))
+
+    assert items == list(range(200))
+
+
+def test_prefetched_runs_on_executor() -> None:
+    def thread_names() -> Iterator[str]:
+        while True:
+            yield current_thread().name
+
+    with ThreadPoolExecutor(thread_name_prefix="worker") as executor:
+        it = prefetched(thread_names(), executor=executor, chunk_size=3)
+        names = [next(it) for _ in range(10)]
+
+    assert all(name.startswith("worker") for name in names)
+
+
+def test_many_prefetched_iterators_share_one_worker() -> None:
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        iterators = [
+            prefetched(iter(range(i, 100, 10)), executor=executor, chunk_size=2)
+            for i in range(10)
+        ]
+        # Consume round-robin, so every iterator needs the worker repeatedly
+        results: list[list[int]] = [[] for _ in iterators]
+        for _ in range(10):
+            for result, it in zip(results, iterators):
+                result.append(next(it))
+
+    assert results == [list(range(i, 100, 10)) for i in range(10)]
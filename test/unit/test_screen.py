@@ -0,0 +1,125 @@
+from io import StringIO
+from os import terminal_size
+from unittest.mock import patch
+
+from git_graph_branch.display import OrderedLines, Screen, display_width, write_frame
+
+
+@patch("shutil.get_terminal_size", new=lambda: terminal_size((80, 24)))
+def test_first_frame_clears_screen() -> None:
+    out = StringIO()
+    Screen(out).render(["a", "b"])
+
+    assert out.getvalue() == "\x1b[2J\x1b[1;1Ha\x1b[K\x1b[2;1Hb\x1b[K\x1b[3;1H"
+
+
+@patch("shutil.get_terminal_size", new=lambda: terminal_size((80, 24)))
+def test_only_changed_lines_rewritten() -> None:
+    out = StringIO()
+    screen = Screen(out)
+    screen.render(["a", "b", "c"])
+    out.truncate(0)
+    out.seek(0)
+
+    screen.render(["a", "B", "c", "d"])
+
+    assert out.getvalue() == "\x1b[2;1HB\x1b[K\x1b[4;1Hd\x1b[K\x1b[5;1H"
+
+
+@patch("shutil.get_terminal_size", new=lambda: terminal_size((80, 24)))
+def test_shorter_frame_clears_below() -> None:
+    out = StringIO()
+    screen = Screen(out)
+    screen.render(["a", "b", "c"])
+    out.truncate(0)
+    out.seek(0)
+
+    screen.render(["a"])
+
+    assert out.getvalue() == "\x1b[2;1H\x1b[J\x1b[2;1H"
+
+
+def test_resize_repaints() -> None:
+    out = StringIO()
+    screen = Screen(out)
+    with patch("shutil.get_terminal_size", new=lambda: terminal_size((80, 24))):
+        screen.render(["a"])
+    out.truncate(0)
+    out.seek(0)
+
+    with patch("shutil.get_terminal_size", new=lambda: terminal_size((100, 24))):
+        screen.render(["a"])
+
+    assert out.getvalue() == "\x1b[2J\x1b[1;1Ha\x1b[K\x1b[2;1H"
+
+
+@patch("shutil.get_terminal_size", new=lambda: terminal_size((10, 24)))
+def test_wrapping_frame_repainted_in_full() -> None:
+    out = StringIO()
+    screen = Screen(out)
+    screen.render(["a", "b"])
+    out.truncate(0)
+    out.seek(0)
+
+    screen.render(["a", "0123456789"])
+    assert out.getvalue() == "\x1b[2J\x1b[Ha\n0123456789\n"
+    out.truncate(0)
+    out.seek(0)
+
+    screen.render(["a", "b"])
+    assert out.getvalue() == "\x1b[2J\x1b[1;1Ha\x1b[K\x1b[2;1Hb\x1b[K\x1b[3;1H"
+
+
+@patch("shutil.get_terminal_size", new=lambda: terminal_size((80, 3)))
+def test_tall_frame_repainted_in_full() -> None:
+    out = StringIO()
+    screen = Screen(out)
+    screen.render(["a", "b", "c"])
+    assert out.getvalue() == "\x1b[2J\x1b[Ha\nb\nc\n"
+    out.truncate(0)
+    out.seek(0)
+
+    screen.render(["a", "b", "C"])
+    assert out.getvalue() == "\x1b[2J\x1b[Ha\nb\nC\n"
+
+
+def test_display_width() -> None:
+    assert display_width("┬  feature \x1b[31m[1 unmerged]\x1b[0m") == 23
+    assert display_width("┴  main 🔶") == 10
+
+
+def test_write_frame_matches_print() -> None:
+    lines = ["┬  feature \x1b[31m[1 unmerged]\x1b[0m", "┴  main"]
+    out = StringIO()
+    expected = StringIO()
+
+    write_frame(lines, out)
+    for line in lines:
+        print(line, file=expected)
+
+    assert out.getvalue() == expected.getvalue()
+
+
+def test_inline_frame_updated_in_place() -> None:
+    out = StringIO()
+    screen = Screen(out, inline=True)
+    screen.render(["a", "b", "c"])
+    assert out.getvalue() == "\ra\nb\nc\n"
+    out.truncate(0)
+    out.seek(0)
+
+    screen.render(["a", "B", "c"])
+
+    assert out.getvalue() == "\x1b[2A\rB\x1b[K\x1b[2B\r"
+
+
+def test_ordered_lines() -> None:
+    out = StringIO()
+    ordered = OrderedLines(out)
+
+    ordered.update([None, "b", None])
+    assert out.getvalue() == ""
+    ordered.update(["a", "b", None])
+    assert out.getvalue() == "a\nb\n"
+    ordered.update(["a", "b", "c"])
+    assert out.getvalue() == "a\nb\nc\n"